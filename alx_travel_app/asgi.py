@@ -14,3 +14,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_travel_app.settings')
 
 application = get_asgi_application()
+
+# Only web servers import this module, so management commands and Celery
+# workers never pay for the autocomplete index.
+from listings.autocomplete import autocomplete  # noqa: E402
+
+autocomplete.warm()
@@ -5,6 +5,9 @@ from celery import Celery
 
 # Set the default Django settings module for the 'celery' program.
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_travel_app.settings')
+# Workers otherwise run Django's system checks on boot, which imports the URLconf
+# and every view. Checks still run for the web process and manage.py.
+os.environ.setdefault('CELERY_SKIP_CHECKS', '1')
 
 app = Celery('alx_travel_app')
 
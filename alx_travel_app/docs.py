@@ -0,0 +1,89 @@
+"""
+API documentation views.
+
+The OpenAPI document is built once with ``manage.py build_openapi_schema``
+into ``OPENAPI_SCHEMA_FILE`` and served from there with ``Cache-Control``
+and ``ETag`` headers, so serving it never introspects the API. Without the
+artifact it is generated on first request and kept in memory for the life
+of the process. drf_yasg is imported on first use rather than when the
+URLconf loads.
+"""
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import require_safe
+from rest_framework import permissions
+
+_lock = threading.Lock()
+_schema = None
+_swagger_ui = None
+
+
+def schema_info():
+    from drf_yasg import openapi
+
+    return openapi.Info(
+        title="ALX Travel API",
+        default_version='v1',
+        description="API documentation for ALX Travel",
+        terms_of_service="https://www.google.com/policies/terms/",
+        contact=openapi.Contact(email="oloobrian89@gmail.com"),
+        license=openapi.License(name="BSD License"),
+    )
+
+
+def generate_schema() -> bytes:
+    """Introspect the API and return its OpenAPI document as JSON."""
+    from drf_yasg.codecs import OpenAPICodecJson
+    from drf_yasg.generators import OpenAPISchemaGenerator
+
+    schema = OpenAPISchemaGenerator(schema_info()).get_schema(request=None, public=True)
+    return OpenAPICodecJson(validators=[]).encode(schema)
+
+
+def load_schema():
+    """Return ``(body, etag)`` for the OpenAPI document, reading or building it once."""
+    global _schema
+    if _schema is None:
+        with _lock:
+            if _schema is None:
+                if os.path.exists(settings.OPENAPI_SCHEMA_FILE):
+                    with open(settings.OPENAPI_SCHEMA_FILE, 'rb') as artifact:
+                        body = artifact.read()
+                else:
+                    body = generate_schema()
+                _schema = (body, f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+    return _schema
+
+
+@require_safe
+def openapi_schema(request):
+    """Serve the OpenAPI document with caching headers."""
+    body, etag = load_schema()
+    if etag in request.headers.get('If-None-Match', ''):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type='application/json')
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=settings.OPENAPI_SCHEMA_CACHE_SECONDS)
+    return response
+
+
+def swagger_ui(request, *args, **kwargs):
+    """Swagger UI; the page loads the document from ``openapi_schema``."""
+    global _swagger_ui
+    if request.GET.get('format') in ('openapi', 'json'):
+        return openapi_schema(request)
+    if _swagger_ui is None:
+        from drf_yasg.views import get_schema_view
+
+        _swagger_ui = get_schema_view(
+            schema_info(),
+            public=True,
+            permission_classes=(permissions.AllowAny,),
+        ).with_ui('swagger', cache_timeout=0)
+    return _swagger_ui(request, *args, **kwargs)
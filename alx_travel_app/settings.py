@@ -10,7 +10,10 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
+from datetime import timedelta
 from pathlib import Path
+from celery.schedules import crontab
+from kombu import Queue
 import environ
 import os
 
@@ -29,7 +32,8 @@ environ.Env.read_env(os.path.join(BASE_DIR, '.env'))
 # SECURITY WARNING: keep the secret key used in production secret!
 SECRET_KEY = 'django-insecure-5zoi^lxs*zx#3v3hq(@v@v*61p_7!uli0rk4o&*u-!73w+gdw^'
 DEBUG = env('DEBUG')
-CHAPA_SECRET_KEY = env('CHAPA_SECRET_KEY')
+# Only read when a payment is made, so processes that never pay can start without it
+CHAPA_SECRET_KEY = env('CHAPA_SECRET_KEY', default='')
 
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
@@ -50,6 +54,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'drf_yasg',
+    'graphene_django',
 
     'listings',
 ]
@@ -63,6 +68,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'listings.throttling.LoadMonitorMiddleware',
 ]
 
 ROOT_URLCONF = 'alx_travel_app.urls'
@@ -137,11 +143,111 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# API docs. `manage.py build_openapi_schema` writes the OpenAPI document to
+# OPENAPI_SCHEMA_FILE at deploy time; /swagger.json serves it with caching headers.
+OPENAPI_SCHEMA_FILE = os.path.join(BASE_DIR, 'openapi.json')
+OPENAPI_SCHEMA_CACHE_SECONDS = 60 * 60
+SWAGGER_SETTINGS = {
+    'SPEC_URL': 'openapi-schema',
+}
+
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Shared between web and worker processes in production, e.g. CACHE_URL=redis://localhost:6379/1
+
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Django REST framework
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': (
+        'listings.authentication.StatelessJWTAuthentication',
+        'rest_framework.authentication.SessionAuthentication',
+    ),
+    # Trusted reverse proxies in front of the app. Throttles identify clients
+    # by the address the outermost of them saw; with 0, X-Forwarded-For is
+    # ignored and REMOTE_ADDR is used.
+    'NUM_PROXIES': env.int('NUM_PROXIES', default=0),
+}
+
+# JWT authentication
+SIMPLE_JWT = {
+    'ACCESS_TOKEN_LIFETIME': timedelta(minutes=5),
+    'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
+    'ROTATE_REFRESH_TOKENS': True,
+    'SIGNING_KEY': env('JWT_SIGNING_KEY', default=SECRET_KEY),
+    'TOKEN_OBTAIN_SERIALIZER': 'listings.authentication.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'listings.authentication.RevocableTokenRefreshSerializer',
+}
+# Maximum number of revoked token ids remembered per process.
+JWT_REVOCATION_LIST_SIZE = 10000
+
+# Rate limiting (token buckets per user and per IP, refill_rate in tokens per second)
+RATE_LIMITS = {
+    'search': {'capacity': 30, 'refill_rate': 1},
+    'booking_create': {'capacity': 10, 'refill_rate': 10 / 60},
+    'payment_initiate': {'capacity': 5, 'refill_rate': 5 / 60},
+}
+# Share of a bucket a process leases at a time and spends without asking the
+# cache. A lease stays spendable for as long as the bucket takes to refill it,
+# but at least RATE_LIMIT_LEASE_SECONDS.
+RATE_LIMIT_LEASE_FRACTION = 0.25
+RATE_LIMIT_LEASE_SECONDS = 1.0
+
+# Load shedding for rate limited endpoints, measured per process
+LOAD_SHEDDING = {
+    'MAX_IN_FLIGHT': 64,
+    'P95_LATENCY_MS': 1500,
+    'WINDOW': 200,
+    'RETRY_AFTER': 5,
+}
+
+# Seconds requests may wait for Chapa to connect, and again for each read
+CHAPA_TIMEOUT = 30
+
+# Idempotency-Key handling for booking creation and payment initiation. The
+# in-progress lock must outlive the slowest handler, including a Chapa call
+# that uses its full connect and read timeouts, or a waiting duplicate would
+# take over and run it again.
+IDEMPOTENCY_KEY_TTL = 60 * 60 * 24
+IDEMPOTENCY_LOCK_TIMEOUT = 2 * CHAPA_TIMEOUT + 30
+IDEMPOTENCY_WAIT_TIMEOUT = 10
+IDEMPOTENCY_POLL_INTERVAL = 0.05
+
+# Seconds between background rebuilds of the listing autocomplete index
+AUTOCOMPLETE_REBUILD_SECONDS = 300
+
+# Currencies. Listing prices are also stored in BASE_CURRENCY for filtering and
+# ordering; rates are fetched from FX_RATES_URL, or read from FX_RATES_FILE when
+# no URL is configured.
+BASE_CURRENCY = 'USD'
+FX_RATES_URL = env('FX_RATES_URL', default='')
+FX_RATES_FILE = os.path.join(BASE_DIR, 'listings', 'fixtures', 'fx_rates.json')
+FX_RATES_CACHE_SECONDS = 60 * 60
+# Currencies Chapa accepts; payments in other currencies are converted to the first.
+CHAPA_CURRENCIES = ('ETB', 'USD')
+
+# IP geolocation, used by `?near=me` listing searches
+GEOIP_URL = env('GEOIP_URL', default='https://api.ipgeolocationapi.com/geolocate/{ip}')
+GEOIP_TIMEOUT = 2
+GEOIP_CACHE_SECONDS = 60 * 60 * 24
+GEOIP_FAILURE_CACHE_SECONDS = 60
+
+# GraphQL
+GRAPHENE = {
+    'SCHEMA': 'listings.schema.schema',
+}
+GRAPHQL_MAX_DEPTH = 6
+GRAPHQL_MAX_COMPLEXITY = 10000
+GRAPHQL_DEFAULT_LIST_SIZE = 20
+GRAPHQL_MAX_LIST_SIZE = 100
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True
 
@@ -156,6 +262,61 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'UTC'
 
+# Queues, highest priority first. Run one worker per queue so each gets its
+# own prefetch, e.g. `celery -A alx_travel_app worker -Q payments --prefetch-multiplier 1`.
+CELERY_TASK_QUEUES = (
+    Queue('payments', routing_key='payments', queue_arguments={'x-max-priority': 10}),
+    Queue('bookings', routing_key='bookings', queue_arguments={'x-max-priority': 10}),
+    Queue('bulk', routing_key='bulk', queue_arguments={'x-max-priority': 10}),
+)
+CELERY_TASK_DEFAULT_QUEUE = 'bulk'
+CELERY_TASK_DEFAULT_PRIORITY = 1
+CELERY_TASK_ROUTES = {
+    'listings.tasks.send_payment_confirmation_email': {'queue': 'payments', 'priority': 9},
+    'listings.tasks.send_booking_confirmation_email': {'queue': 'bookings', 'priority': 5},
+}
+# Prefetch multiplier per queue, passed to that queue's worker as
+# `--prefetch-multiplier`: payment work is never stuck behind a prefetched
+# backlog, bulk work trades latency for throughput. Workers started without
+# the option, or consuming several queues, use the most conservative value.
+CELERY_QUEUE_PREFETCH_MULTIPLIERS = {
+    'payments': 1,
+    'bookings': 4,
+    'bulk': 16,
+}
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+# Late acknowledgement per queue: payment and booking tasks are redelivered if
+# a worker dies mid-task, periodic bulk tasks are acked on receipt and simply
+# run again on their next schedule.
+CELERY_QUEUE_ACKS_LATE = {
+    'payments': True,
+    'bookings': True,
+    'bulk': False,
+}
+CELERY_TASK_ACKS_LATE = CELERY_QUEUE_ACKS_LATE[CELERY_TASK_DEFAULT_QUEUE]
+CELERY_TASK_ANNOTATIONS = {
+    task: {'acks_late': CELERY_QUEUE_ACKS_LATE[route['queue']]} for task, route in CELERY_TASK_ROUTES.items()
+}
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
+CELERY_TASK_IGNORE_RESULT = True
+# How long a completed task id is remembered by the idempotency registry.
+CELERY_TASK_IDEMPOTENCY_TTL = 60 * 60 * 24 * 7
+
+CELERY_BEAT_SCHEDULE = {
+    'archive-completed-bookings': {
+        'task': 'listings.tasks.archive_completed_bookings',
+        'schedule': crontab(hour=3, minute=0),
+    },
+    'refresh-exchange-rates': {
+        'task': 'listings.tasks.refresh_exchange_rates',
+        'schedule': crontab(minute=15),
+    },
+}
+
+# Booking archival
+BOOKING_ARCHIVE_AFTER_MONTHS = 12
+BOOKING_ARCHIVE_BATCH_SIZE = 500
+
 # Email Backend (example)
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.example.com'
@@ -16,27 +16,18 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from listings.views import RevokeTokenView
 
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="ALX Travel API",
-        default_version='v1',
-        description="API documentation for ALX Travel",
-        terms_of_service="https://www.google.com/policies/terms/",
-        contact=openapi.Contact(email="oloobrian89@gmail.com"),
-        license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+from . import docs
 
 urlpatterns = [
     path('admin/', admin.site.urls),
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+    path('swagger/', docs.swagger_ui, name='schema-swagger-ui'),
+    path('swagger.json', docs.openapi_schema, name='openapi-schema'),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework')),
+    path('api/auth/token/', TokenObtainPairView.as_view(), name='token-obtain-pair'),
+    path('api/auth/token/refresh/', TokenRefreshView.as_view(), name='token-refresh'),
+    path('api/auth/token/revoke/', RevokeTokenView.as_view(), name='token-revoke'),
     path('api/', include('listings.urls')),
 ]
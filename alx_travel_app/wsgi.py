@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'alx_travel_app.settings')
 
 application = get_wsgi_application()
+
+# Only web servers import this module, so management commands and Celery
+# workers never pay for the autocomplete index.
+from listings.autocomplete import autocomplete  # noqa: E402
+
+autocomplete.warm()
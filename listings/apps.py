@@ -6,3 +6,6 @@ class ListingsConfig(AppConfig):
     name = 'listings'
     verbose_name = 'Listings'
     label = 'listings'
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
@@ -0,0 +1,75 @@
+"""
+Time-based archival of completed bookings.
+
+Bookings that ended more than ``settings.BOOKING_ARCHIVE_AFTER_MONTHS`` ago
+are moved, together with their reviews and payments, into the archive
+tables in chunked batches. This keeps the hot tables (and their indexes)
+sized to current activity; history reads fall through to the archive.
+"""
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (ArchivedBooking, ArchivedPayment, ArchivedReview, Booking,
+                     Payment, Review)
+
+
+def archive_cutoff(months: int = None, today=None):
+    """Return the end date before which bookings are archived."""
+    if months is None:
+        months = settings.BOOKING_ARCHIVE_AFTER_MONTHS
+    today = today or timezone.now().date()
+    return today - relativedelta(months=months)
+
+
+def _copy_rows(queryset, archive_model) -> None:
+    """Insert every row of ``queryset`` into ``archive_model``, keeping primary keys."""
+    fields = [field.attname for field in queryset.model._meta.concrete_fields]
+    archive_model.objects.bulk_create(
+        [archive_model(**row) for row in queryset.values(*fields)],
+        ignore_conflicts=True,
+    )
+
+
+def archive_batch(cutoff, batch_size: int) -> int:
+    """Archive up to ``batch_size`` bookings that ended before ``cutoff``.
+
+    Runs in a single transaction so a booking is never visible in both tables
+    or in neither. Returns the number of bookings moved.
+    """
+    with transaction.atomic():
+        booking_ids = list(
+            Booking.objects.select_for_update(skip_locked=True)
+            .filter(end_date__lt=cutoff)
+            .order_by('end_date')
+            .values_list('booking_id', flat=True)[:batch_size]
+        )
+        if not booking_ids:
+            return 0
+
+        bookings = Booking.objects.filter(booking_id__in=booking_ids)
+        reviews = Review.objects.filter(booking_id__in=booking_ids)
+        payments = Payment.objects.filter(booking_id__in=booking_ids)
+
+        _copy_rows(bookings, ArchivedBooking)
+        _copy_rows(reviews, ArchivedReview)
+        _copy_rows(payments, ArchivedPayment)
+
+        payments.delete()
+        reviews.delete()
+        bookings.delete()
+    return len(booking_ids)
+
+
+def archive_bookings(months: int = None, batch_size: int = None) -> int:
+    """Archive every booking past the cutoff, one batch at a time."""
+    if batch_size is None:
+        batch_size = settings.BOOKING_ARCHIVE_BATCH_SIZE
+    cutoff = archive_cutoff(months)
+    total = 0
+    while True:
+        moved = archive_batch(cutoff, batch_size)
+        total += moved
+        if moved < batch_size:
+            return total
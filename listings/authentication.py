@@ -0,0 +1,117 @@
+"""
+Stateless JWT authentication for the API.
+
+Access tokens carry the claims permission checks need (user id, username,
+email, staff flags), so authenticating a request is a signature check and a
+dictionary lookup: no session row and no ``auth_user`` fetch. Refreshing is
+the one place the user is loaded again, so deactivated users are refused
+and new tokens carry current claims. Revoked token
+ids are kept in a bounded, process-local revocation list; entries are
+dropped once the token would have expired anyway.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.authentication import JWTStatelessUserAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class RevocationList:
+    """Bounded set of revoked token ids with their expiry times."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._revoked = OrderedDict()
+        self._lock = threading.Lock()
+
+    def revoke(self, jti: str, expires_at: float) -> None:
+        """Revoke ``jti`` until ``expires_at`` (a Unix timestamp)."""
+        with self._lock:
+            self._revoked[jti] = expires_at
+            self._revoked.move_to_end(jti)
+            if len(self._revoked) > self.max_size:
+                self._purge_expired()
+            while len(self._revoked) > self.max_size:
+                # Full of live entries: forget the oldest revocation first.
+                self._revoked.popitem(last=False)
+
+    def is_revoked(self, jti: str) -> bool:
+        expires_at = self._revoked.get(jti)
+        return expires_at is not None and expires_at > time.time()
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    def _purge_expired(self) -> None:
+        now = time.time()
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+
+
+revocations = RevocationList(max_size=settings.JWT_REVOCATION_LIST_SIZE)
+
+
+def revoke_token(token) -> None:
+    """Add a validated token to the revocation list."""
+    revocations.revoke(token[api_settings.JTI_CLAIM], token['exp'])
+
+
+class StatelessJWTAuthentication(JWTStatelessUserAuthentication):
+    """JWT authentication that builds the user from token claims and honours revocations."""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if revocations.is_revoked(token[api_settings.JTI_CLAIM]):
+            raise InvalidToken({'detail': 'Token has been revoked.', 'code': 'token_revoked'})
+        return token
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Issue tokens carrying the user claims the API reads without a DB hit."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['username'] = user.get_username()
+        token['email'] = user.email
+        token['is_staff'] = user.is_staff
+        token['is_superuser'] = user.is_superuser
+        return token
+
+
+class RevocableTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refuse revoked refresh tokens and inactive users, and revoke the old token on rotation.
+
+    New tokens are issued from the current user rather than copied from the
+    refresh token, so claim changes take effect on the next refresh.
+    """
+
+    def validate(self, attrs):
+        refresh = RefreshToken(attrs['refresh'])
+        if revocations.is_revoked(refresh[api_settings.JTI_CLAIM]):
+            raise InvalidToken({'detail': 'Token has been revoked.', 'code': 'token_revoked'})
+
+        user = self.get_user(refresh)
+        token = ClaimsTokenObtainPairSerializer.get_token(user)
+        data = {'access': str(token.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            revoke_token(refresh)
+            data['refresh'] = str(token)
+        return data
+
+    def get_user(self, refresh):
+        """Load the refresh token's user, refusing missing or inactive accounts."""
+        User = get_user_model()
+        try:
+            user = User.objects.get(**{api_settings.USER_ID_FIELD: refresh[api_settings.USER_ID_CLAIM]})
+        except (KeyError, User.DoesNotExist):
+            user = None
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed('No active account found for this token.', 'no_active_account')
+        return user
@@ -0,0 +1,274 @@
+"""
+In-process prefix index for listing autocomplete.
+
+Every suggestion (a listing title, or a town or county shared by several
+listings) is indexed under each of its words, so "beach" finds "Cozy Beach
+House". Each word has a posting list of suggestions kept sorted by
+popularity (bookings, plus listing count for places), and the distinct
+words are kept in a sorted array. A prefix query bisects that array for
+the matching words and lazily merges their posting lists, stopping after
+``limit`` results, so it reads only what it returns. Results for one to
+three letter prefixes are memoised until a suggestion under them changes.
+
+Web processes build the index in the background at startup (see
+``alx_travel_app/wsgi.py``), and any other process builds it on first use;
+either way it is kept current from ``Listing`` save/delete signals. Writes from other processes are picked up by a
+background rebuild every ``AUTOCOMPLETE_REBUILD_SECONDS``.
+"""
+import heapq
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Count
+
+from .models import Listing
+
+_WORD = re.compile(r'\w+', re.UNICODE)
+
+
+def words(text: str):
+    return _WORD.findall(text.lower())
+
+
+class PrefixIndex:
+    """Word prefix index over listing titles, towns and counties."""
+    cached_prefix_length = 3
+    max_cached_prefixes = 4096
+
+    def __init__(self):
+        self._words = []
+        self._postings = {}
+        self._suggestions = {}
+        self._listings = {}
+        self._cache = {}
+        self._lock = threading.RLock()
+
+    def build(self, rows) -> None:
+        """Replace the index with ``rows`` of (listing_id, title, town, county, popularity)."""
+        index = PrefixIndex()
+        for row in rows:
+            index._add_listing(*row, keep_sorted=False)
+        for key, suggestion in index._suggestions.items():
+            index._post(key, suggestion, keep_sorted=False)
+        for postings in index._postings.values():
+            postings.sort()
+        index._words = sorted(index._postings)
+        with self._lock:
+            self._words = index._words
+            self._postings = index._postings
+            self._suggestions = index._suggestions
+            self._listings = index._listings
+            self._cache = {}
+
+    def update_listing(self, listing_id, title: str, town: str, county: str, popularity: int = None) -> None:
+        """Add or refresh one listing, keeping its popularity unless given."""
+        with self._lock:
+            previous = self._listings.get(listing_id)
+            if popularity is None:
+                popularity = previous[3] if previous else 0
+            if previous:
+                self._remove_listing(listing_id)
+            self._add_listing(listing_id, title, town, county, popularity)
+
+    def remove_listing(self, listing_id) -> None:
+        with self._lock:
+            if listing_id in self._listings:
+                self._remove_listing(listing_id)
+
+    def search(self, query: str, limit: int = 10):
+        """Return up to ``limit`` suggestions for ``query``, most popular first."""
+        query_words = words(query)
+        if not query_words:
+            return []
+        prefix = ' '.join(query_words)
+        cacheable = len(query_words) == 1 and len(prefix) <= self.cached_prefix_length
+        if cacheable:
+            cached = self._cache.get(prefix, {}).get(limit)
+            if cached is not None:
+                return cached
+
+        with self._lock:
+            if len(query_words) == 1:
+                # Every word starting with the prefix.
+                start = bisect_left(self._words, prefix)
+                end = bisect_left(self._words, prefix + '\uffff', start)
+                candidate_words = self._words[start:end]
+            else:
+                # Later words are checked against the suggestion text below.
+                candidate_words = [query_words[0]] if query_words[0] in self._postings else []
+
+            results, seen = [], set()
+            for _, key in heapq.merge(*(self._postings[word] for word in candidate_words)):
+                if key in seen:
+                    continue
+                seen.add(key)
+                text = self._suggestions[key][0]
+                if len(query_words) > 1:
+                    normalized = ' '.join(words(text))
+                    if not (normalized.startswith(prefix) or f' {prefix}' in normalized):
+                        continue
+                results.append({'text': text, 'kind': key[0],
+                                'listing_id': key[1] if key[0] == 'title' else None})
+                if len(results) == limit:
+                    break
+            if cacheable and len(self._cache) < self.max_cached_prefixes:
+                self._cache.setdefault(prefix, {})[limit] = results
+        return results
+
+    def __len__(self) -> int:
+        return len(self._listings)
+
+    def _add_listing(self, listing_id, title, town, county, popularity, keep_sorted=True):
+        self._listings[listing_id] = (title, town, county, popularity)
+        self._add_suggestion(('title', listing_id), title, popularity, keep_sorted)
+        # Places rank by bookings across their listings, then by listing count.
+        self._add_suggestion(('town', ' '.join(words(town))), town, popularity + 1, keep_sorted)
+        self._add_suggestion(('county', ' '.join(words(county))), county, popularity + 1, keep_sorted)
+
+    def _remove_listing(self, listing_id):
+        title, town, county, popularity = self._listings.pop(listing_id)
+        self._remove_suggestion(('title', listing_id), popularity)
+        self._remove_suggestion(('town', ' '.join(words(town))), popularity + 1)
+        self._remove_suggestion(('county', ' '.join(words(county))), popularity + 1)
+
+    def _add_suggestion(self, key, text, weight, keep_sorted):
+        """Count a listing towards ``key``; while building, posting is left to ``build``."""
+        suggestion = self._suggestions.get(key)
+        if suggestion is None:
+            suggestion = self._suggestions[key] = [text, 0, 0, tuple(dict.fromkeys(words(text)))]
+        elif keep_sorted:
+            self._unpost(key, suggestion)
+        suggestion[1] += weight
+        suggestion[2] += 1
+        if keep_sorted:
+            self._post(key, suggestion, keep_sorted=True)
+
+    def _remove_suggestion(self, key, weight):
+        suggestion = self._suggestions[key]
+        self._unpost(key, suggestion)
+        suggestion[1] -= weight
+        suggestion[2] -= 1
+        if suggestion[2] > 0:
+            self._post(key, suggestion, keep_sorted=True)
+        else:
+            del self._suggestions[key]
+
+    def _post(self, key, suggestion, keep_sorted):
+        """Add ``key`` to the posting list of each of its words."""
+        entry = (-suggestion[1], key)
+        for word in suggestion[3]:
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = []
+                if keep_sorted:
+                    insort(self._words, word)
+            if keep_sorted:
+                insort(postings, entry)
+            else:
+                postings.append(entry)
+        self._invalidate(suggestion)
+
+    def _unpost(self, key, suggestion):
+        """Remove ``key`` from the posting lists of its words."""
+        entry = (-suggestion[1], key)
+        for word in suggestion[3]:
+            postings = self._postings[word]
+            position = bisect_left(postings, entry)
+            if position < len(postings) and postings[position] == entry:
+                del postings[position]
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect_left(self._words, word)]
+        self._invalidate(suggestion)
+
+    def _invalidate(self, suggestion):
+        if not self._cache:
+            return
+        for word in suggestion[3]:
+            for length in range(1, min(len(word), self.cached_prefix_length) + 1):
+                self._cache.pop(word[:length], None)
+
+
+class ListingAutocomplete:
+    """The process-wide listing index, loaded from the database."""
+
+    def __init__(self):
+        self.index = PrefixIndex()
+        self.built_at = None
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+        self._warming = False
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def rows(self):
+        return (Listing.objects.annotate(popularity=Count('bookings'))
+                .values_list('listing_id', 'title', 'town', 'county', 'popularity')
+                .iterator(chunk_size=2000))
+
+    def rebuild(self) -> None:
+        self.index.build(self.rows())
+        self.built_at = time.monotonic()
+
+    def warm(self) -> None:
+        """Build the index in a background thread so the first query does not wait for it."""
+        self._warming = True
+        threading.Thread(target=self._warm, daemon=True).start()
+
+    def search(self, query: str, limit: int = 10):
+        if self.built_at is None:
+            # Waits for a warm-up build in progress rather than starting another.
+            with self._build_lock:
+                if self.built_at is None:
+                    self.rebuild()
+        elif time.monotonic() - self.built_at > settings.AUTOCOMPLETE_REBUILD_SECONDS and not self._rebuilding:
+            self._rebuilding = True
+            threading.Thread(target=self._rebuild_in_background, daemon=True).start()
+        return self.index.search(query, limit)
+
+    def listing_saved(self, listing) -> None:
+        if self.built_at is not None:
+            self.index.update_listing(listing.pk, listing.title, listing.town, listing.county)
+
+    def listing_deleted(self, listing) -> None:
+        if self.built_at is not None:
+            self.index.remove_listing(listing.pk)
+
+    def _warm(self):
+        from django.db import connection
+
+        try:
+            with self._build_lock:
+                if self.built_at is None:
+                    self.rebuild()
+        except DatabaseError:
+            # Not migrated yet; the first query builds the index instead.
+            pass
+        finally:
+            self._warming = False
+            connection.close()
+
+    def _after_fork(self):
+        # Threads do not survive fork, so a child of a process that was still
+        # building (e.g. gunicorn --preload) would wait on their lock forever.
+        self._build_lock = threading.Lock()
+        self._rebuilding = False
+        if self._warming:
+            self.warm()
+
+    def _rebuild_in_background(self):
+        from django.db import connection
+
+        try:
+            self.rebuild()
+        finally:
+            self._rebuilding = False
+            connection.close()
+
+
+autocomplete = ListingAutocomplete()
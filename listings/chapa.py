@@ -0,0 +1,32 @@
+"""
+Chapa payment gateway client.
+
+``requests`` and the secret key are loaded on first use rather than at
+import, so processes that never talk to Chapa (Celery workers, management
+commands, docs) do not pay for them at startup.
+"""
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+CHAPA_API_URL = "https://api.chapa.co/v1/transaction/initialize"
+CHAPA_VERIFY_URL = "https://api.chapa.co/v1/transaction/verify/"
+
+
+def _headers() -> dict:
+    if not settings.CHAPA_SECRET_KEY:
+        raise ImproperlyConfigured("Set CHAPA_SECRET_KEY to accept payments.")
+    return {"Authorization": f"Bearer {settings.CHAPA_SECRET_KEY}"}
+
+
+def initialize_transaction(data: dict):
+    """Start a Chapa checkout; returns the HTTP response."""
+    import requests
+
+    return requests.post(CHAPA_API_URL, json=data, headers=_headers(), timeout=settings.CHAPA_TIMEOUT)
+
+
+def verify_transaction(tx_ref: str):
+    """Look up the status of a Chapa transaction; returns the HTTP response."""
+    import requests
+
+    return requests.get(f"{CHAPA_VERIFY_URL}{tx_ref}/", headers=_headers(), timeout=settings.CHAPA_TIMEOUT)
@@ -0,0 +1,35 @@
+"""
+System checks for settings the listings app relies on.
+"""
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    backend = settings.CACHES.get('default', {}).get('BACKEND')
+    if backend not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Warning(
+        f"The default cache ({backend}) is not shared between processes.",
+        hint=("Idempotency-Key locks, rate limit buckets and the Celery task "
+              "registry only deduplicate within one process on it. Set CACHE_URL "
+              "to a shared cache such as redis://localhost:6379/1."),
+        id='listings.W001',
+    )]
+
+
+@register()
+def check_idempotency_lock_timeout(app_configs, **kwargs):
+    if settings.IDEMPOTENCY_LOCK_TIMEOUT > 2 * settings.CHAPA_TIMEOUT:
+        return []
+    return [Error(
+        "IDEMPOTENCY_LOCK_TIMEOUT must be longer than a Chapa call's connect and read timeouts.",
+        hint=f"Set it above {2 * settings.CHAPA_TIMEOUT} seconds (2 * CHAPA_TIMEOUT).",
+        id='listings.E001',
+    )]
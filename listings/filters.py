@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+from rest_framework import filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.throttling import BaseThrottle
+from decimal import Decimal, InvalidOperation
+import math
+
+from .fx import to_base_currency
+from .geo import EARTH_RADIUS_KM, bounding_box, covering_cells, prefix_upper_bound
+from .geoip import locate
+
+
+def distance_km(latitude: float, longitude: float):
+    """Haversine distance in kilometres from a point to a listing, as a SQL expression."""
+    lat0 = math.radians(latitude)
+    lng0 = math.radians(longitude)
+    half_dlat = (Radians(F('latitude')) - Value(lat0)) / Value(2.0)
+    half_dlng = (Radians(F('longitude')) - Value(lng0)) / Value(2.0)
+    a = (Power(Sin(half_dlat), 2)
+         + Value(math.cos(lat0)) * Cos(Radians(F('latitude'))) * Power(Sin(half_dlng), 2))
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Value(1.0), Sqrt(a)), output_field=FloatField())
+
+
+class NearFilter(filters.BaseFilterBackend):
+    """Filter listings within ``radius_km`` of ``?near=lat,lng``, nearest first.
+
+    ``?near=me`` (or ``radius_km`` without ``near``) uses the caller's
+    IP-derived location. Candidates are narrowed by geohash cell ranges and a
+    bounding box on indexed columns, then refined by exact distance.
+    """
+    default_radius_km = 10.0
+    max_radius_km = 200.0
+
+    def filter_queryset(self, request, queryset, view):
+        near = request.query_params.get('near')
+        radius = request.query_params.get('radius_km')
+        if near is None and radius is None:
+            return queryset
+
+        radius_km = self.parse_radius(radius)
+        if near in (None, '', 'me'):
+            latitude, longitude = self.ip_location(request)
+        else:
+            latitude, longitude = self.parse_point(near)
+
+        cells = Q()
+        for prefix in covering_cells(latitude, longitude, radius_km):
+            cell = Q(geohash__gte=prefix)
+            upper = prefix_upper_bound(prefix)
+            if upper is not None:
+                cell &= Q(geohash__lt=upper)
+            cells |= cell
+        queryset = queryset.filter(cells)
+
+        min_lat, max_lat, min_lng, max_lng = bounding_box(latitude, longitude, radius_km)
+        queryset = queryset.filter(latitude__gte=min_lat, latitude__lte=max_lat)
+        if -180.0 <= min_lng and max_lng <= 180.0:
+            queryset = queryset.filter(longitude__gte=min_lng, longitude__lte=max_lng)
+
+        return (queryset.annotate(distance_km=distance_km(latitude, longitude))
+                .filter(distance_km__lte=radius_km)
+                .order_by('distance_km'))
+
+    def parse_radius(self, value):
+        if value is None:
+            return self.default_radius_km
+        try:
+            radius_km = float(value)
+        except ValueError:
+            raise ValidationError({'radius_km': "Must be a number."})
+        if not 0 < radius_km <= self.max_radius_km:
+            raise ValidationError({'radius_km': f"Must be between 0 and {self.max_radius_km:g}."})
+        return radius_km
+
+    def parse_point(self, value):
+        try:
+            latitude, longitude = (float(part) for part in value.split(','))
+        except ValueError:
+            raise ValidationError({'near': "Expected 'lat,lng' or 'me'."})
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+            raise ValidationError({'near': "Coordinates out of range."})
+        return latitude, longitude
+
+    def ip_location(self, request):
+        """Return the caller's IP-derived (latitude, longitude)."""
+        # Same client address the throttles use, honouring NUM_PROXIES.
+        point = locate(BaseThrottle().get_ident(request))
+        if point is None:
+            raise ValidationError({'near': "Could not determine your location, pass 'near=lat,lng'."})
+        return point
+
+
+class PriceRangeFilter(filters.BaseFilterBackend):
+    """Filter listings by nightly price with ``?min_price=`` and ``?max_price=``.
+
+    Bounds are in the base currency, or in ``?price_currency=`` when given;
+    they are converted once and compared against the indexed
+    ``price_per_night_base`` column.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        currency = request.query_params.get('price_currency', settings.BASE_CURRENCY)
+        for param, lookup in (('min_price', 'price_per_night_base__gte'), ('max_price', 'price_per_night_base__lte')):
+            value = request.query_params.get(param)
+            if value in (None, ''):
+                continue
+            bound = to_base_currency(self.parse_price(param, value), currency)
+            if bound is None:
+                raise ValidationError({'price_currency': f"Unknown currency '{currency}'."})
+            queryset = queryset.filter(**{lookup: bound})
+        return queryset
+
+    def parse_price(self, param, value):
+        try:
+            price = Decimal(value)
+        except InvalidOperation:
+            raise ValidationError({param: "Must be a number."})
+        if not price.is_finite() or price < 0:
+            raise ValidationError({param: "Must be a non-negative number."})
+        return price
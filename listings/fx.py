@@ -0,0 +1,118 @@
+"""
+Exchange rates and base currency prices.
+
+Rates are stored in the ``ExchangeRate`` table as units of each currency
+per unit of ``settings.BASE_CURRENCY`` and cached as one dict in the Django
+cache. Listings carry a denormalized ``price_per_night_base`` column so
+price filters and ordering across currencies run in SQL. It is set on save
+from the stored rate, not the cache, which may be stale in other processes.
+Every refresh also rewrites, with one UPDATE per currency, any base price
+that does not match the current rate.
+"""
+from decimal import Decimal
+import json
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Q, Value
+
+RATES_CACHE_KEY = 'fx:rates'
+CENT = Decimal('0.01')
+# Base prices further than this from the current rate are repriced.
+REPRICE_TOLERANCE = Decimal('0.005')
+
+
+def get_rates() -> dict:
+    """Return ``{currency: units per base unit}``, including the base currency."""
+    rates = cache.get(RATES_CACHE_KEY)
+    if rates is None:
+        ExchangeRate = apps.get_model('listings', 'ExchangeRate')
+        rates = dict(ExchangeRate.objects.values_list('currency', 'rate'))
+        rates[settings.BASE_CURRENCY] = Decimal(1)
+        cache.set(RATES_CACHE_KEY, rates, settings.FX_RATES_CACHE_SECONDS)
+    return rates
+
+
+def to_base_currency(amount, currency: str):
+    """Convert ``amount`` to the base currency, or return None if the rate is unknown."""
+    if amount is None or not currency:
+        return None
+    rate = get_rates().get(currency.upper())
+    if not rate:
+        return None
+    return (Decimal(amount) / rate).quantize(CENT)
+
+
+def stored_base_price(amount, currency: str):
+    """Like ``to_base_currency``, but with the rate read from the database rather than the cache."""
+    if amount is None or not currency:
+        return None
+    currency = currency.upper()
+    if currency == settings.BASE_CURRENCY:
+        return Decimal(amount).quantize(CENT)
+    ExchangeRate = apps.get_model('listings', 'ExchangeRate')
+    rate = ExchangeRate.objects.filter(currency=currency).values_list('rate', flat=True).first()
+    if not rate:
+        return None
+    return (Decimal(amount) / rate).quantize(CENT)
+
+
+def convert(amount, from_currency: str, to_currency: str) -> Decimal:
+    """Convert ``amount`` between two currencies; raises ValueError for unknown currencies."""
+    rates = get_rates()
+    try:
+        from_rate = rates[from_currency.upper()]
+        to_rate = rates[to_currency.upper()]
+    except KeyError as exc:
+        raise ValueError(f"No exchange rate for {exc.args[0]}.")
+    return (Decimal(amount) / from_rate * to_rate).quantize(CENT)
+
+
+def load_rates() -> dict:
+    """Read the latest rates from ``FX_RATES_URL``, or from ``FX_RATES_FILE`` when no URL is set."""
+    if settings.FX_RATES_URL:
+        import requests
+
+        response = requests.get(settings.FX_RATES_URL, timeout=10)
+        response.raise_for_status()
+        payload = response.json()
+    else:
+        with open(settings.FX_RATES_FILE) as fixture:
+            payload = json.load(fixture)
+
+    if payload.get('base', settings.BASE_CURRENCY).upper() != settings.BASE_CURRENCY:
+        raise ValueError(f"Rates must be quoted against {settings.BASE_CURRENCY}.")
+    return {currency.upper(): Decimal(str(rate)) for currency, rate in payload['rates'].items()
+            if len(currency) <= 4 and rate}
+
+
+def update_rates(rates: dict) -> int:
+    """Store ``rates`` and reprice listings whose base price does not match them.
+
+    Every currency is checked, not just those whose rate changed, so a
+    listing priced from a stale rate is corrected on the next refresh.
+    Returns the number of listings repriced.
+    """
+    ExchangeRate = apps.get_model('listings', 'ExchangeRate')
+    Listing = apps.get_model('listings', 'Listing')
+    rates = {currency: rate for currency, rate in rates.items() if currency != settings.BASE_CURRENCY}
+    current = dict(ExchangeRate.objects.values_list('currency', 'rate'))
+    changed = {currency: rate for currency, rate in rates.items() if current.get(currency) != rate}
+
+    repriced = 0
+    with transaction.atomic():
+        for currency, rate in changed.items():
+            ExchangeRate.objects.update_or_create(currency=currency, defaults={'rate': rate})
+        for currency, rate in {**current, **rates}.items():
+            base_price = ExpressionWrapper(F('price_per_night') / Value(rate),
+                                           output_field=DecimalField(max_digits=14, decimal_places=2))
+            stale = (Q(price_per_night_base__isnull=True)
+                     | Q(price_per_night_base__lt=base_price - Value(REPRICE_TOLERANCE))
+                     | Q(price_per_night_base__gt=base_price + Value(REPRICE_TOLERANCE)))
+            repriced += Listing.objects.filter(stale, currency=currency).update(price_per_night_base=base_price)
+        repriced += Listing.objects.filter(currency=settings.BASE_CURRENCY).exclude(
+            price_per_night_base=F('price_per_night')).update(price_per_night_base=F('price_per_night'))
+        transaction.on_commit(lambda: cache.delete(RATES_CACHE_KEY))
+    return repriced
@@ -0,0 +1,113 @@
+"""
+Geohash grid helpers for "near me" search without a spatial database.
+
+Listings store the geohash of their coordinates in an indexed column. A
+radius search picks the finest grid whose cells are at least as large as
+the radius, so the circle always lies within the 3x3 block of cells around
+its centre, and turns each cell prefix into an index range scan that works
+on MySQL and SQLite alike.
+"""
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9
+EARTH_RADIUS_KM = 6371.0088
+# Widens prefilters slightly so points on the circle survive float rounding.
+EXTENT_MARGIN = 1.001
+
+
+def encode(latitude: float, longitude: float, precision: int = GEOHASH_PRECISION) -> str:
+    """Return the geohash of a point."""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    geohash, bits, char, even = [], 0, 0, True
+    while len(geohash) < precision:
+        value, interval = (longitude, lng_range) if even else (latitude, lat_range)
+        mid = (interval[0] + interval[1]) / 2
+        char <<= 1
+        if value >= mid:
+            char |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            geohash.append(BASE32[char])
+            bits, char = 0, 0
+    return ''.join(geohash)
+
+
+def cell_size(precision: int):
+    """Return the (latitude, longitude) span in degrees of a geohash cell."""
+    bits = precision * 5
+    return 180.0 / 2 ** (bits // 2), 360.0 / 2 ** (bits - bits // 2)
+
+
+def angular_extent(latitude: float, radius_km: float):
+    """Return the largest (latitude, longitude) offsets in degrees of a point within ``radius_km``.
+
+    Uses the same sphere as the exact distance check. The longitude offset is
+    that of the circle's widest point, which lies poleward of the centre; it
+    is 180 when the circle contains a pole.
+    """
+    angle = radius_km / EARTH_RADIUS_KM
+    lat_degrees = math.degrees(angle) * EXTENT_MARGIN
+    sin_ratio = math.sin(angle) / max(math.cos(math.radians(latitude)), 1e-12)
+    lng_degrees = 180.0 if sin_ratio >= 1 else min(math.degrees(math.asin(sin_ratio)) * EXTENT_MARGIN, 180.0)
+    return lat_degrees, lng_degrees
+
+
+def precision_for_radius(latitude: float, radius_km: float) -> int:
+    """Return the finest precision whose cells are at least ``radius_km`` wide.
+
+    Returns 0 when even single-character cells are too small, as near a pole.
+    """
+    lat_degrees, lng_degrees = angular_extent(latitude, radius_km)
+    lat_span, lng_span = cell_size(1)
+    if lat_span < lat_degrees or lng_span < lng_degrees:
+        return 0
+    precision = 1
+    while precision < GEOHASH_PRECISION:
+        lat_span, lng_span = cell_size(precision + 1)
+        if lat_span < lat_degrees or lng_span < lng_degrees:
+            break
+        precision += 1
+    return precision
+
+
+def covering_cells(latitude: float, longitude: float, radius_km: float):
+    """Return the geohash prefixes of the 3x3 cell block covering the circle."""
+    precision = precision_for_radius(latitude, radius_km)
+    if precision == 0:
+        # The empty prefix matches every geohash.
+        return ['']
+    lat_span, lng_span = cell_size(precision)
+    cells = set()
+    for dlat in (-lat_span, 0, lat_span):
+        for dlng in (-lng_span, 0, lng_span):
+            cell_lat = min(max(latitude + dlat, -90.0), 90.0)
+            cell_lng = (longitude + dlng + 180.0) % 360.0 - 180.0
+            cells.add(encode(cell_lat, cell_lng, precision))
+    return sorted(cells)
+
+
+def prefix_upper_bound(prefix: str):
+    """Return the smallest geohash greater than every hash starting with ``prefix``.
+
+    Returns None when no such hash exists (the prefix is all ``z``).
+    """
+    chars = list(prefix)
+    while chars:
+        index = BASE32.index(chars[-1])
+        if index + 1 < len(BASE32):
+            chars[-1] = BASE32[index + 1]
+            return ''.join(chars)
+        chars.pop()
+    return None
+
+
+def bounding_box(latitude: float, longitude: float, radius_km: float):
+    """Return (min_lat, max_lat, min_lng, max_lng) around a circle, ignoring antimeridian wrap."""
+    lat_degrees, lng_degrees = angular_extent(latitude, radius_km)
+    return (latitude - lat_degrees, latitude + lat_degrees,
+            longitude - lng_degrees, longitude + lng_degrees)
@@ -0,0 +1,34 @@
+"""
+IP geolocation for ``?near=me`` listing searches.
+
+Calls the ipgeolocationapi.com endpoint used by django-ip-geolocation's
+``IPGeolocationAPI`` backend directly, so the request thread never waits
+longer than ``GEOIP_TIMEOUT``. Locations are cached per IP for
+``GEOIP_CACHE_SECONDS`` and failures for ``GEOIP_FAILURE_CACHE_SECONDS``,
+so an unavailable service is not asked again on every search.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+FAILED = 'failed'
+
+
+def locate(ip: str):
+    """Return the ``(latitude, longitude)`` of ``ip``, or None if it cannot be located."""
+    key = f"geoip:{ip}"
+    point = cache.get(key)
+    if point is not None:
+        return None if point == FAILED else point
+
+    import requests
+
+    try:
+        response = requests.get(settings.GEOIP_URL.format(ip=ip), timeout=settings.GEOIP_TIMEOUT)
+        response.raise_for_status()
+        geo = response.json()['geo']
+        point = (float(geo['latitude']), float(geo['longitude']))
+    except (requests.RequestException, ValueError, KeyError, TypeError):
+        cache.set(key, FAILED, settings.GEOIP_FAILURE_CACHE_SECONDS)
+        return None
+    cache.set(key, point, settings.GEOIP_CACHE_SECONDS)
+    return point
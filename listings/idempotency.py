@@ -0,0 +1,115 @@
+"""
+``Idempotency-Key`` handling for unsafe API requests.
+
+The first request with a given key runs the view and stores its response in
+the Django cache for ``IDEMPOTENCY_KEY_TTL`` seconds; retries with the same
+key get that response replayed. A duplicate arriving while the first
+request is still running waits for it to finish instead of running again.
+Keys are scoped per user and endpoint, and reusing a key with a different
+request body is rejected. Views using ``ReplayExemptThrottlesMixin`` do not
+charge replays of stored responses against their rate limits.
+
+The lock and stored responses live in the Django cache, so it must be shared
+by every web process; the ``listings.W001`` check warns when it is not.
+"""
+import functools
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.response import Response
+
+HEADER = 'Idempotency-Key'
+IN_PROGRESS = 'in_progress'
+COMPLETED = 'completed'
+
+
+def _fingerprint(request) -> str:
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256(f"{request.method} {request.path} {body}".encode()).hexdigest()
+
+
+def _cache_key(scope: str, request, idempotency_key: str) -> str:
+    return f"idempotency:{scope}:{request.user.id}:{hashlib.sha256(idempotency_key.encode()).hexdigest()}"
+
+
+def _replay(record) -> Response:
+    return Response(record['data'], status=record['status'], headers={'Idempotent-Replayed': 'true'})
+
+
+def is_replay(request, scope: str) -> bool:
+    """Whether ``request`` will be answered with a stored response in ``scope``."""
+    idempotency_key = request.headers.get(HEADER)
+    if not idempotency_key or len(idempotency_key) > 255:
+        return False
+    record = cache.get(_cache_key(scope, request, idempotency_key))
+    return bool(record) and record['state'] == COMPLETED and record['fingerprint'] == _fingerprint(request)
+
+
+def idempotent(scope: str):
+    """Decorate a view handler so requests with an ``Idempotency-Key`` run at most once."""
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(self, request, *args, **kwargs):
+            idempotency_key = request.headers.get(HEADER)
+            if not idempotency_key:
+                return handler(self, request, *args, **kwargs)
+            if len(idempotency_key) > 255:
+                return Response({'error': f'{HEADER} must be at most 255 characters.'},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            key = _cache_key(scope, request, idempotency_key)
+            fingerprint = _fingerprint(request)
+            lock = {'state': IN_PROGRESS, 'fingerprint': fingerprint}
+
+            deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_TIMEOUT
+            while not cache.add(key, lock, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+                record = cache.get(key)
+                if record is None:
+                    # The first request failed or its lock expired; try to take over.
+                    continue
+                if record['fingerprint'] != fingerprint:
+                    return Response({'error': f'{HEADER} was already used for a different request.'},
+                                    status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+                if record['state'] == COMPLETED:
+                    return _replay(record)
+                if time.monotonic() >= deadline:
+                    return Response({'error': 'A request with this Idempotency-Key is still in progress.'},
+                                    status=status.HTTP_409_CONFLICT,
+                                    headers={'Retry-After': str(settings.IDEMPOTENCY_LOCK_TIMEOUT)})
+                time.sleep(settings.IDEMPOTENCY_POLL_INTERVAL)
+
+            try:
+                response = handler(self, request, *args, **kwargs)
+            except BaseException:
+                cache.delete(key)
+                raise
+
+            if response.status_code >= 500:
+                # Let the client retry server errors.
+                cache.delete(key)
+            else:
+                cache.set(key, {
+                    'state': COMPLETED,
+                    'fingerprint': fingerprint,
+                    'status': response.status_code,
+                    'data': response.data,
+                }, settings.IDEMPOTENCY_KEY_TTL)
+            return response
+        wrapper.idempotency_scope = scope
+        return wrapper
+    return decorator
+
+
+class ReplayExemptThrottlesMixin:
+    """Skip throttles for requests that replay a stored ``idempotent`` response."""
+
+    def check_throttles(self, request):
+        handler = getattr(self, getattr(self, 'action', None) or request.method.lower(), None)
+        scope = getattr(handler, 'idempotency_scope', None)
+        if scope and is_replay(request, scope):
+            return
+        super().check_throttles(request)
@@ -0,0 +1,114 @@
+"""
+Per-request DataLoaders for the GraphQL schema.
+
+graphql-core executes synchronous resolvers depth-first, so a loader cannot
+wait for sibling resolvers to ask for their keys before hitting the
+database. Instead, every resolver that returns model instances ``track``s
+them: the keys their relations will need are queued on the matching
+loaders, and the first ``load`` fetches every queued key in one query. A
+nested query therefore costs one query per relation per level, however
+many objects each level returns.
+
+Bookings and payments are private: their loaders only return rows of the
+requesting user, whichever path of the graph reaches them. One-to-many
+loaders fetch at most ``GRAPHQL_MAX_LIST_SIZE`` rows per parent.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+
+from .models import Booking, Listing, Payment, Review
+
+
+class DataLoader:
+    """Batching, caching loader for a single relation."""
+
+    def __init__(self, batch_load_fn, default=None):
+        self.batch_load_fn = batch_load_fn
+        self.default = default
+        self._cache = {}
+        self._pending = set()
+
+    def prime(self, keys) -> None:
+        """Queue ``keys`` to be fetched with the next batch."""
+        self._pending.update(key for key in keys if key is not None and key not in self._cache)
+
+    def load(self, key):
+        """Return the value for ``key``, fetching it with every queued key if needed."""
+        if key not in self._cache:
+            self.prime([key])
+            keys = list(self._pending)
+            self._pending.clear()
+            results = self.batch_load_fn(keys)
+            for batch_key in keys:
+                self._cache[batch_key] = results.get(batch_key, self.default() if self.default else None)
+        return self._cache[key]
+
+
+class Loaders:
+    """The DataLoaders of one GraphQL request."""
+
+    def __init__(self, user):
+        self.user = user
+        self.listing = DataLoader(self._by_pk(Listing))
+        self.user_by_id = DataLoader(self._by_pk(User))
+        self.booking = DataLoader(self._by_pk(Booking, user_id=user.id))
+        self.reviews_by_listing = DataLoader(self._grouped(Review, 'listing_id'), default=list)
+        self.reviews_by_booking = DataLoader(self._grouped(Review, 'booking_id'), default=list)
+        self.payments_by_booking = DataLoader(self._grouped(Payment, 'booking_id', user_id=user.id), default=list)
+        self.bookings_by_listing = DataLoader(self._grouped(Booking, 'listing_id', user_id=user.id), default=list)
+
+    def track(self, instances):
+        """Queue the relation keys of ``instances`` on their loaders and return them."""
+        instances = list(instances)
+        for instance in instances:
+            if isinstance(instance, Listing):
+                self.user_by_id.prime([instance.host_id])
+                self.reviews_by_listing.prime([instance.pk])
+                self.bookings_by_listing.prime([instance.pk])
+            elif isinstance(instance, Booking):
+                self.listing.prime([instance.listing_id_id])
+                self.user_by_id.prime([instance.user_id])
+                self.reviews_by_booking.prime([instance.pk])
+                self.payments_by_booking.prime([instance.pk])
+            elif isinstance(instance, Review):
+                self.listing.prime([instance.listing_id_id])
+                self.user_by_id.prime([instance.user_id])
+                self.booking.prime([instance.booking_id_id])
+            elif isinstance(instance, Payment):
+                self.booking.prime([instance.booking_id_id])
+                self.user_by_id.prime([instance.user_id])
+        return instances
+
+    def _by_pk(self, model, **filters):
+        def batch_load(keys):
+            queryset = model.objects.filter(pk__in=keys, **filters)
+            return {instance.pk: instance for instance in self.track(queryset)}
+        return batch_load
+
+    def _grouped(self, model, field, **filters):
+        attname = model._meta.get_field(field).attname
+
+        def batch_load(keys):
+            queryset = (model.objects.filter(**{f'{field}__in': keys}, **filters)
+                        .annotate(position=Window(RowNumber(), partition_by=F(field),
+                                                  order_by=model._meta.ordering))
+                        .filter(position__lte=settings.GRAPHQL_MAX_LIST_SIZE))
+            grouped = defaultdict(list)
+            for instance in self.track(queryset):
+                grouped[getattr(instance, attname)].append(instance)
+            return grouped
+        return batch_load
+
+
+def get_loaders(info) -> Loaders:
+    """Return the loaders of the request being resolved, creating them on first use."""
+    request = info.context
+    loaders = getattr(request, '_graphql_loaders', None)
+    if loaders is None:
+        loaders = Loaders(request.user)
+        request._graphql_loaders = loaders
+    return loaders
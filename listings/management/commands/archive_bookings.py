@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from listings.archive import archive_bookings, archive_cutoff
+
+
+class Command(BaseCommand):
+    help = "Move bookings that ended long ago, with their reviews and payments, into the archive tables"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months', type=int, default=settings.BOOKING_ARCHIVE_AFTER_MONTHS,
+                            help="Archive bookings that ended more than this many months ago.")
+        parser.add_argument('--batch-size', type=int, default=settings.BOOKING_ARCHIVE_BATCH_SIZE,
+                            help="Number of bookings moved per transaction.")
+
+    def handle(self, *args, **options):
+        cutoff = archive_cutoff(options['months'])
+        self.stdout.write(f"Archiving bookings that ended before {cutoff}...")
+        archived = archive_bookings(months=options['months'], batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} booking(s)."))
@@ -0,0 +1,53 @@
+from django.core.management.base import BaseCommand
+from faker import Faker
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+
+from listings.autocomplete import PrefixIndex
+
+
+class Command(BaseCommand):
+    help = "Report memory footprint and query latency of the autocomplete index on synthetic listings"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--listings', type=int, default=100000,
+                            help="Number of synthetic listings to index.")
+        parser.add_argument('--queries', type=int, default=5000,
+                            help="Number of prefix queries to time.")
+
+    def handle(self, *args, **options):
+        fake = Faker()
+        Faker.seed(0)
+        random.seed(0)
+        towns = [fake.city() for _ in range(2000)]
+        counties = [fake.state() for _ in range(50)]
+        rows = [(uuid.uuid4(), fake.catch_phrase(), random.choice(towns), random.choice(counties),
+                 random.randint(0, 200)) for _ in range(options['listings'])]
+
+        tracemalloc.start()
+        index = PrefixIndex()
+        start = time.perf_counter()
+        index.build(rows)
+        build_seconds = time.perf_counter() - start
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        words = [word for row in rows[:1000] for word in row[1].lower().split()]
+        prefixes = [word[:random.randint(1, len(word))] for word in random.choices(words, k=options['queries'])]
+        timings = []
+        for prefix in prefixes:
+            start = time.perf_counter()
+            index.search(prefix)
+            timings.append((time.perf_counter() - start) * 1e6)
+        timings.sort()
+
+        per_100k = memory / options['listings'] * 100000
+        self.stdout.write(f"Listings indexed:       {len(index)}")
+        self.stdout.write(f"Build time:             {build_seconds:.2f} s")
+        self.stdout.write(f"Memory:                 {memory / 2 ** 20:.1f} MiB ({per_100k / 2 ** 20:.1f} MiB per 100k listings)")
+        self.stdout.write(f"Query latency median:   {statistics.median(timings):.1f} us")
+        self.stdout.write(f"Query latency p99:      {timings[int(len(timings) * 0.99)]:.1f} us")
+        self.stdout.write(self.style.SUCCESS("Done."))
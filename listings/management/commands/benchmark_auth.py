@@ -0,0 +1,82 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import User
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.request import Request
+from rest_framework_simplejwt.tokens import AccessToken
+import time
+
+from listings.authentication import StatelessJWTAuthentication
+
+
+class Command(BaseCommand):
+    help = "Compare per-request authentication overhead of sessions and stateless JWTs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000,
+                            help="Number of requests authenticated per scheme.")
+
+    def handle(self, *args, **options):
+        count = options['requests']
+        with transaction.atomic():
+            user = User.objects.create_user(username='benchmark-auth-user', password='benchmark')
+            results = [
+                ('session', self.session_requests(user, count)),
+                ('jwt', self.jwt_requests(user, count)),
+            ]
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'scheme':<10} {'requests':>8} {'us/request':>11} {'queries/request':>16}")
+        for scheme, (elapsed, queries) in results:
+            self.stdout.write(f"{scheme:<10} {count:>8} {elapsed / count * 1e6:>11.1f} {queries / count:>16.2f}")
+        self.stdout.write(self.style.SUCCESS("Benchmark complete."))
+
+    def session_requests(self, user, count):
+        """Authenticate ``count`` requests through the session and auth middleware."""
+        factory = RequestFactory()
+        session_middleware = SessionMiddleware(lambda request: HttpResponse())
+        auth_middleware = AuthenticationMiddleware(lambda request: HttpResponse())
+
+        login = factory.get('/')
+        session_middleware.process_request(login)
+        login.session['_auth_user_id'] = str(user.pk)
+        login.session['_auth_user_backend'] = settings.AUTHENTICATION_BACKENDS[0]
+        login.session['_auth_user_hash'] = user.get_session_auth_hash()
+        login.session.save()
+        cookie = {settings.SESSION_COOKIE_NAME: login.session.session_key}
+
+        authenticator = SessionAuthentication()
+        return self.timed(count, lambda: self.authenticate_session(
+            factory, cookie, session_middleware, auth_middleware, authenticator))
+
+    def authenticate_session(self, factory, cookie, session_middleware, auth_middleware, authenticator):
+        request = factory.get('/')
+        request.COOKIES.update(cookie)
+        session_middleware.process_request(request)
+        auth_middleware.process_request(request)
+        request._dont_enforce_csrf_checks = True
+        return authenticator.authenticate(Request(request))
+
+    def jwt_requests(self, user, count):
+        """Authenticate ``count`` requests carrying a bearer token."""
+        factory = RequestFactory()
+        header = f"Bearer {AccessToken.for_user(user)}"
+        authenticator = StatelessJWTAuthentication()
+        return self.timed(count, lambda: authenticator.authenticate(
+            Request(factory.get('/', HTTP_AUTHORIZATION=header))))
+
+    def timed(self, count, authenticate):
+        """Run ``authenticate`` ``count`` times; return elapsed seconds and queries issued."""
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            for _ in range(count):
+                if authenticate() is None:
+                    raise RuntimeError("Request was not authenticated.")
+            elapsed = time.perf_counter() - start
+        return elapsed, len(queries.captured_queries)
@@ -0,0 +1,91 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from celery import Celery
+from celery.contrib.testing.worker import start_worker
+from celery.signals import task_postrun
+import threading
+import time
+import uuid
+
+from listings.tasks import IdempotentTask
+
+
+class Command(BaseCommand):
+    help = "Benchmark Celery task throughput per queue using the in-memory broker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=2000,
+                            help="Number of unique tasks published per scenario.")
+        parser.add_argument('--queues', nargs='+', default=None,
+                            help="Queues to benchmark (defaults to every configured queue).")
+
+    def handle(self, *args, **options):
+        count = options['tasks']
+        queues = options['queues'] or [queue.name for queue in settings.CELERY_TASK_QUEUES]
+
+        app = Celery('benchmark', broker='memory://', backend='cache+memory://', set_as_current=False)
+        app.conf.update(
+            task_queues=settings.CELERY_TASK_QUEUES,
+            task_default_queue=settings.CELERY_TASK_DEFAULT_QUEUE,
+            task_ignore_result=False,
+            # The memory transport polls once a second by default, which would cap throughput.
+            broker_transport_options={'polling_interval': 0.001},
+        )
+
+        @app.task(name='benchmark.stored_result')
+        def stored_result():
+            return None
+
+        @app.task(name='benchmark.ignored_result', ignore_result=True)
+        def ignored_result():
+            return None
+
+        @app.task(name='benchmark.idempotent', base=IdempotentTask)
+        def idempotent():
+            return None
+
+        scenarios = [
+            ('stored result', stored_result, 1),
+            ('ignore_result', ignored_result, 1),
+            ('idempotent', idempotent, 1),
+            ('idempotent, 2x duplicates', idempotent, 2),
+        ]
+
+        self.stdout.write(f"{'queue':<10} {'scenario':<28} {'messages':>8} {'publish/s':>10} {'processed/s':>12}")
+        for queue in queues:
+            prefetch = settings.CELERY_QUEUE_PREFETCH_MULTIPLIERS.get(queue, 1)
+            for label, task, copies in scenarios:
+                task.acks_late = settings.CELERY_QUEUE_ACKS_LATE.get(queue, settings.CELERY_TASK_ACKS_LATE)
+                messages, publish_rate, process_rate = self.run_scenario(app, task, queue, count, copies, prefetch)
+                self.stdout.write(f"{queue:<10} {label:<28} {messages:>8} {publish_rate:>10.0f} {process_rate:>12.0f}")
+
+        self.stdout.write(self.style.SUCCESS("Benchmark complete."))
+
+    def run_scenario(self, app, task, queue, count, copies, prefetch):
+        """Publish ``count`` tasks ``copies`` times each and time a worker draining them."""
+        messages = count * copies
+        processed = [0]
+        finished = threading.Event()
+
+        def on_postrun(sender=None, **kwargs):
+            processed[0] += 1
+            if processed[0] >= messages:
+                finished.set()
+
+        task_postrun.connect(on_postrun, sender=task, weak=False)
+        try:
+            with start_worker(app, pool='solo', perform_ping_check=False, queues=[queue],
+                              prefetch_multiplier=prefetch):
+                start = time.perf_counter()
+                task_ids = [str(uuid.uuid4()) for _ in range(count)]
+                with app.producer_or_acquire() as producer:
+                    for _ in range(copies):
+                        for task_id in task_ids:
+                            task.apply_async(queue=queue, task_id=task_id, producer=producer)
+                published = time.perf_counter()
+                finished.wait(timeout=300)
+                done = time.perf_counter()
+        finally:
+            task_postrun.disconnect(on_postrun, sender=task)
+
+        return messages, messages / (published - start), processed[0] / (done - start)
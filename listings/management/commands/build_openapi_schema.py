@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+import os
+import tempfile
+import time
+
+from alx_travel_app.docs import generate_schema
+
+
+class Command(BaseCommand):
+    help = "Build the OpenAPI document once into a static file served by /swagger.json"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', default=settings.OPENAPI_SCHEMA_FILE,
+                            help="Where to write the schema.")
+
+    def handle(self, *args, **options):
+        output = options['output']
+        start = time.perf_counter()
+        body = generate_schema()
+        elapsed = time.perf_counter() - start
+
+        # Write to a temporary file and rename it, so readers never see a partial document
+        directory = os.path.dirname(os.path.abspath(output))
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile('wb', dir=directory, delete=False) as artifact:
+            artifact.write(body)
+        os.chmod(artifact.name, 0o644)
+        os.replace(artifact.name, output)
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(body) / 1024:.1f} KiB OpenAPI schema to {output} in {elapsed * 1000:.0f} ms."))
@@ -0,0 +1,106 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+import json
+import os
+import subprocess
+import sys
+
+# Boots the project in a fresh interpreter, timing each startup phase the way
+# a new web process would: settings, every app's import, models and ready(),
+# the URLconf and the WSGI handler with its middleware. With --celery the last
+# two are replaced by importing the task modules, as a Celery worker does.
+STARTUP_SCRIPT = '''
+import json, sys, time
+from django.apps.config import AppConfig
+
+timings = {"phases": [], "apps": []}
+
+def timed(kind, label, func, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        timings[kind].append((label, time.perf_counter() - start))
+
+create = AppConfig.create.__func__
+import_models = AppConfig.import_models
+
+def timed_create(cls, entry):
+    return timed("apps", f"import {entry}", create, cls, entry)
+
+def timed_import_models(self):
+    timed("apps", f"models {self.label}", import_models, self)
+    ready = self.ready
+    self.ready = lambda: timed("apps", f"ready {self.label}", ready)
+
+AppConfig.create = classmethod(timed_create)
+AppConfig.import_models = timed_import_models
+
+import django
+from django.conf import settings
+timed("phases", "settings", lambda: settings.INSTALLED_APPS)
+timed("phases", "django.setup", django.setup)
+if "--celery" in sys.argv:
+    from alx_travel_app.celery import app
+    timed("phases", "celery tasks", app.loader.import_default_modules)
+else:
+    from django.urls import get_resolver
+    timed("phases", "urlconf", lambda: get_resolver().url_patterns)
+    from django.core.handlers.wsgi import WSGIHandler
+    timed("phases", "wsgi handler", WSGIHandler)
+sys.stdout.write(json.dumps(timings))
+'''
+
+
+class Command(BaseCommand):
+    help = "Report the slowest imports and app startup steps of a fresh process"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=15,
+                            help="Number of imports and steps to list.")
+        parser.add_argument('--celery', action='store_true',
+                            help="Profile a Celery worker boot instead of a web process.")
+
+    def handle(self, *args, **options):
+        command = [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT]
+        if options['celery']:
+            command.append('--celery')
+        env = dict(os.environ)
+        env.setdefault('DJANGO_SETTINGS_MODULE', settings.SETTINGS_MODULE)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [str(settings.BASE_DIR), env.get('PYTHONPATH')]))
+        result = subprocess.run(command, capture_output=True, text=True, env=env, cwd=settings.BASE_DIR)
+        if result.returncode != 0:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+        timings = json.loads(result.stdout)
+        imports = self.parse_importtime(result.stderr)
+        limit = options['limit']
+
+        total = sum(seconds for _, seconds in timings['phases'])
+        self.stdout.write(f"Startup phases: {total * 1000:.1f} ms, excluding interpreter start")
+        self.write_steps(timings['phases'])
+        self.stdout.write("\nSlowest app steps (django.setup):")
+        self.write_steps(sorted(timings['apps'], key=lambda step: -step[1])[:limit])
+        self.stdout.write("\nSlowest imports (cumulative, includes modules they pull in):")
+        self.write_imports(sorted(imports, key=lambda row: -row[2])[:limit])
+        self.stdout.write("\nSlowest imports (self time):")
+        self.write_imports(sorted(imports, key=lambda row: -row[1])[:limit])
+
+    def parse_importtime(self, output):
+        """Return ``(module, self_us, cumulative_us)`` rows from ``-X importtime`` output."""
+        rows = []
+        for line in output.splitlines():
+            if not line.startswith('import time:') or 'self [us]' in line:
+                continue
+            self_us, cumulative_us, module = line[len('import time:'):].split('|')
+            rows.append((module.strip(), int(self_us), int(cumulative_us)))
+        return rows
+
+    def write_steps(self, steps):
+        for label, seconds in steps:
+            self.stdout.write(f"  {label:<48} {seconds * 1000:>9.1f} ms")
+
+    def write_imports(self, rows):
+        self.stdout.write(f"  {'module':<48} {'self ms':>9} {'cumulative ms':>14}")
+        for module, self_us, cumulative_us in rows:
+            self.stdout.write(f"  {module:<48} {self_us / 1000:>9.1f} {cumulative_us / 1000:>14.1f}")
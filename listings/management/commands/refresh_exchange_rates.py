@@ -0,0 +1,15 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from listings.fx import load_rates, update_rates
+
+
+class Command(BaseCommand):
+    help = "Load the latest exchange rates and reprice listings in the base currency"
+
+    def handle(self, *args, **options):
+        source = settings.FX_RATES_URL or settings.FX_RATES_FILE
+        self.stdout.write(f"Loading {settings.BASE_CURRENCY} exchange rates from {source}...")
+        rates = load_rates()
+        repriced = update_rates(rates)
+        self.stdout.write(self.style.SUCCESS(f"Stored {len(rates)} rate(s), repriced {repriced} listing(s)."))
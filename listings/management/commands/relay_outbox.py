@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from datetime import timedelta
+import time
+
+from listings.outbox import publish_pending, purge_published
+
+
+class Command(BaseCommand):
+    help = "Publish pending outbox messages to the Celery broker"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=100,
+                            help="Maximum number of messages published per batch.")
+        parser.add_argument('--interval', type=float, default=1.0,
+                            help="Seconds to sleep when the outbox is drained.")
+        parser.add_argument('--once', action='store_true',
+                            help="Drain the outbox once and exit instead of polling.")
+        parser.add_argument('--purge-days', type=int, default=7,
+                            help="Delete published messages older than this many days.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        purge_after = timedelta(days=options['purge_days'])
+
+        while True:
+            published = publish_pending(batch_size=batch_size)
+            if published:
+                self.stdout.write(f"Published {published} outbox message(s).")
+            if published < batch_size:
+                purged = purge_published(purge_after)
+                if purged:
+                    self.stdout.write(f"Purged {purged} published message(s).")
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS("Outbox drained."))
@@ -1,6 +1,9 @@
 from django.db import models
 import uuid
 
+from .fx import stored_base_price
+from .geo import encode as geohash_encode
+
 
 # Create your models here.
 class Listing(models.Model):
@@ -11,11 +14,16 @@ class Listing(models.Model):
     description = models.TextField(verbose_name="Description")
     price_per_night = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Price")
     currency = models.CharField(max_length=4, default='USD', verbose_name="Currency")
+    price_per_night_base = models.DecimalField(max_digits=14, decimal_places=2, blank=True, null=True,
+                                               editable=False, verbose_name="Price in Base Currency")
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
     updated_at = models.DateTimeField(auto_now_add=True, verbose_name="Updated At")
     county = models.CharField(max_length=50, verbose_name="County")
     town = models.CharField(max_length=50, verbose_name="Town")
     street = models.CharField(max_length=50, verbose_name="Street")
+    latitude = models.FloatField(blank=True, null=True, verbose_name="Latitude")
+    longitude = models.FloatField(blank=True, null=True, verbose_name="Longitude")
+    geohash = models.CharField(max_length=12, blank=True, null=True, editable=False, verbose_name="Geohash")
     image = models.ImageField(upload_to='listings/', verbose_name="Image")
     host = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='listings',
                              verbose_name="Host")
@@ -40,6 +48,23 @@ class Listing(models.Model):
         """String Representation of listings"""
         return f"{self.title} - {self.county}, {self.town}"
 
+    def save(self, *args, **kwargs):
+        """Keep the geohash and base currency price in sync with their source fields."""
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = geohash_encode(self.latitude, self.longitude)
+        else:
+            self.geohash = None
+        self.price_per_night_base = stored_base_price(self.price_per_night, self.currency)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if {'latitude', 'longitude'} & update_fields:
+                update_fields.add('geohash')
+            if {'price_per_night', 'currency'} & update_fields:
+                update_fields.add('price_per_night_base')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
     class Meta:
         """Meta class for listing model."""
         verbose_name = "Listing"
@@ -56,6 +81,8 @@ class Listing(models.Model):
             models.Index(fields=['category'], name='listing_category_idx'),
             models.Index(fields=['created_at'], name='listing_created_at_idx'),
             models.Index(fields=['updated_at'], name='listing_updated_at_idx'),
+            models.Index(fields=['geohash'], name='listing_geohash_idx'),
+            models.Index(fields=['price_per_night_base'], name='listing_price_base_idx'),
         ]
 
 
@@ -199,3 +226,140 @@ class Payment(models.Model):
             models.Index(fields=['payment_date'], name='payment_date_idx'),
             models.Index(fields=['status'], name='payment_status_idx'),
         ]
+
+
+class OutboxMessage(models.Model):
+    """Class to represent a task waiting to be published to the broker."""
+    message_id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False,
+                                  unique=True, verbose_name="Message ID")
+    dedup_key = models.CharField(max_length=255, unique=True, verbose_name="Deduplication Key")
+    task_name = models.CharField(max_length=255, verbose_name="Task Name")
+    args = models.JSONField(default=list, blank=True, verbose_name="Arguments")
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name="Keyword Arguments")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Created At")
+    published_at = models.DateTimeField(blank=True, null=True, verbose_name="Published At")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Attempts")
+    last_error = models.TextField(blank=True, null=True, verbose_name="Last Error")
+
+    def __str__(self) -> str:
+        """String Representation of OutboxMessage."""
+        return f"Outbox {self.task_name} [{self.dedup_key}]"
+
+    class Meta:
+        """Meta class for OutboxMessage."""
+        verbose_name = "Outbox Message"
+        verbose_name_plural = "Outbox Messages"
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['published_at', 'created_at'], name='outbox_pending_idx'),
+        ]
+
+
+class ArchivedBooking(models.Model):
+    """Class to represent a booking moved out of the hot Booking table."""
+    booking_id = models.UUIDField(primary_key=True, editable=False, verbose_name="Booking ID")
+    listing_id = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='archived_bookings',
+                                   verbose_name="Listing")
+    user = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='archived_bookings',
+                             verbose_name="User")
+    start_date = models.DateField(verbose_name="Start Date")
+    end_date = models.DateField(verbose_name="End Date")
+    created_at = models.DateTimeField(verbose_name="Created At")
+    updated_at = models.DateTimeField(verbose_name="Updated At")
+    booking_status = models.CharField(max_length=20, verbose_name="Status")
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Total Price")
+    guest_count = models.PositiveIntegerField(verbose_name="Guest Count")
+    special_requests = models.TextField(blank=True, null=True, verbose_name="Special Requests")
+    payment_status = models.CharField(max_length=20, verbose_name="Payment Status")
+    payment_method = models.CharField(max_length=50, verbose_name="Payment Method")
+    cancellation_policy = models.CharField(max_length=50, verbose_name="Cancellation Policy")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Archived At")
+
+    def __str__(self) -> str:
+        """String Representation of ArchivedBooking."""
+        return f"Archived booking {self.booking_id}"
+
+    class Meta:
+        """Meta class for ArchivedBooking."""
+        verbose_name = "Archived Booking"
+        verbose_name_plural = "Archived Bookings"
+        ordering = ['-start_date']
+        indexes = [
+            models.Index(fields=['user', 'start_date'], name='archived_booking_user_idx'),
+            models.Index(fields=['listing_id'], name='archived_booking_listing_idx'),
+        ]
+
+
+class ArchivedReview(models.Model):
+    """Class to represent a review of an archived booking."""
+    review_id = models.UUIDField(primary_key=True, editable=False, verbose_name="Review ID")
+    listing_id = models.ForeignKey(Listing, on_delete=models.CASCADE, related_name='archived_reviews',
+                                   verbose_name="Listing")
+    user = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='archived_reviews',
+                             verbose_name="User")
+    booking_id = models.ForeignKey(ArchivedBooking, on_delete=models.CASCADE, related_name='reviews',
+                                   verbose_name="Booking")
+    rating = models.DecimalField(max_digits=3, decimal_places=2, verbose_name="Rating")
+    comment = models.TextField(blank=True, verbose_name="Comment")
+    created_at = models.DateTimeField(verbose_name="Created At")
+    updated_at = models.DateTimeField(verbose_name="Updated At")
+    approved = models.BooleanField(default=False, verbose_name="Approved")
+    response = models.TextField(blank=True, null=True, verbose_name="Response")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Archived At")
+
+    def __str__(self) -> str:
+        """String Representation of ArchivedReview."""
+        return f"Archived review {self.review_id}"
+
+    class Meta:
+        """Meta class for ArchivedReview."""
+        verbose_name = "Archived Review"
+        verbose_name_plural = "Archived Reviews"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['listing_id'], name='archived_review_listing_idx'),
+        ]
+
+
+class ArchivedPayment(models.Model):
+    """Class to represent a payment of an archived booking."""
+    payment_id = models.UUIDField(primary_key=True, editable=False, verbose_name="Payment ID")
+    user = models.ForeignKey('auth.User', on_delete=models.CASCADE, related_name='archived_payments',
+                             verbose_name="User")
+    booking_id = models.ForeignKey(ArchivedBooking, on_delete=models.CASCADE, related_name='payments',
+                                   verbose_name="Booking")
+    chapa_tx_ref = models.CharField(max_length=100, unique=True, verbose_name="Chapa Transaction Reference")
+    amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name="Amount")
+    currency = models.CharField(max_length=4, verbose_name="Currency")
+    payment_date = models.DateTimeField(verbose_name="Payment Date")
+    payment_method = models.CharField(max_length=50, verbose_name="Payment Method")
+    status = models.CharField(max_length=20, verbose_name="Status")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Archived At")
+
+    def __str__(self) -> str:
+        """String Representation of ArchivedPayment."""
+        return f"Archived payment {self.payment_id}"
+
+    class Meta:
+        """Meta class for ArchivedPayment."""
+        verbose_name = "Archived Payment"
+        verbose_name_plural = "Archived Payments"
+        ordering = ['-payment_date']
+
+
+class ExchangeRate(models.Model):
+    """Class to represent the exchange rate of a currency against the base currency."""
+    currency = models.CharField(max_length=4, primary_key=True, verbose_name="Currency")
+    rate = models.DecimalField(max_digits=18, decimal_places=8,
+                               verbose_name="Units per Base Currency Unit")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Updated At")
+
+    def __str__(self) -> str:
+        """String Representation of ExchangeRate."""
+        return f"1 base = {self.rate} {self.currency}"
+
+    class Meta:
+        """Meta class for ExchangeRate."""
+        verbose_name = "Exchange Rate"
+        verbose_name_plural = "Exchange Rates"
+        ordering = ['currency']
@@ -0,0 +1,81 @@
+"""
+Transactional outbox for Celery task dispatch.
+
+Views record tasks as ``OutboxMessage`` rows in the same database
+transaction as the booking or payment they belong to. The relay
+(``python manage.py relay_outbox``) publishes pending rows to the broker in
+batches, so request latency no longer depends on the broker and a rolled
+back transaction never fires its tasks.
+
+Delivery is at-least-once: a row is only marked as published after the
+broker accepted it. Each message is sent with its ``dedup_key`` as the
+Celery task id so consumers can discard redeliveries.
+"""
+import uuid
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from alx_travel_app.celery import app as celery_app
+from .models import OutboxMessage
+
+
+def enqueue(task, *args, dedup_key=None, **kwargs) -> OutboxMessage:
+    """Record ``task(*args, **kwargs)`` for publishing by the relay.
+
+    Call this inside the transaction that writes the related rows. Enqueuing
+    the same ``dedup_key`` twice returns the existing message.
+    """
+    task_name = task if isinstance(task, str) else task.name
+    if dedup_key is None:
+        dedup_key = str(uuid.uuid4())
+    message, _ = OutboxMessage.objects.get_or_create(
+        dedup_key=dedup_key,
+        defaults={'task_name': task_name, 'args': list(args), 'kwargs': kwargs},
+    )
+    return message
+
+
+def publish_pending(batch_size: int = 100, app=None) -> int:
+    """Publish up to ``batch_size`` pending messages and return how many were sent.
+
+    Rows are locked with ``SKIP LOCKED`` where the database supports it so
+    several relays can run side by side. Publishing stops at the first broker
+    error; the failed row keeps its error and is retried on the next run.
+    """
+    app = app or celery_app
+    published = 0
+    with transaction.atomic():
+        batch = list(
+            OutboxMessage.objects.select_for_update(skip_locked=True)
+            .filter(published_at__isnull=True)
+            .order_by('created_at')[:batch_size]
+        )
+        if not batch:
+            return 0
+
+        touched = []
+        with app.producer_or_acquire() as producer:
+            for message in batch:
+                message.attempts += 1
+                touched.append(message)
+                try:
+                    app.send_task(message.task_name, args=message.args, kwargs=message.kwargs,
+                                  task_id=message.dedup_key, producer=producer)
+                except Exception as exc:
+                    message.last_error = str(exc)
+                    break
+                message.published_at = timezone.now()
+                message.last_error = None
+                published += 1
+
+        OutboxMessage.objects.bulk_update(touched, ['attempts', 'published_at', 'last_error'])
+    return published
+
+
+def purge_published(older_than: timedelta) -> int:
+    """Delete messages published more than ``older_than`` ago."""
+    cutoff = timezone.now() - older_than
+    deleted, _ = OutboxMessage.objects.filter(published_at__lt=cutoff).delete()
+    return deleted
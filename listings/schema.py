@@ -0,0 +1,229 @@
+"""
+GraphQL schema over listings, bookings, reviews and payments.
+
+Relations resolve through the per-request loaders in ``listings.loaders``
+so nested queries cost a bounded number of SQL queries. Every list, nested
+or not, returns at most ``first`` items (``GRAPHQL_DEFAULT_LIST_SIZE`` by
+default). Query depth and estimated complexity are capped by validation
+rules before execution.
+"""
+import graphene
+from django.conf import settings
+from django.contrib.auth.models import User
+from graphene.validation import depth_limit_validator
+from graphene_django import DjangoObjectType
+from graphql import (FieldNode, FragmentSpreadNode, GraphQLError, InlineFragmentNode, IntValueNode,
+                     NullValueNode, ValidationRule, get_named_type, get_nullable_type, is_list_type)
+
+from .loaders import get_loaders
+from .models import Booking, Listing, Payment, Review
+
+
+def _page_size(first):
+    """Clamp a ``first`` argument to the configured list size limits."""
+    if first is None:
+        return settings.GRAPHQL_DEFAULT_LIST_SIZE
+    return max(0, min(first, settings.GRAPHQL_MAX_LIST_SIZE))
+
+
+def _related_list(of_type, **kwargs):
+    """A nested list field capped by a ``first`` argument."""
+    return graphene.List(graphene.NonNull(of_type), first=graphene.Int(), **kwargs)
+
+
+class UserType(DjangoObjectType):
+    """Public view of a user."""
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'first_name', 'last_name')
+
+
+class ListingType(DjangoObjectType):
+    """GraphQL type for Listing."""
+    host = graphene.Field(UserType)
+    reviews = _related_list(lambda: ReviewType)
+    bookings = _related_list(lambda: BookingType, description="The current user's bookings of this listing.")
+
+    class Meta:
+        model = Listing
+        fields = ('listing_id', 'title', 'description', 'price_per_night', 'currency', 'price_per_night_base',
+                  'created_at', 'updated_at', 'county', 'town', 'street', 'image', 'amenities', 'max_guests',
+                  'availability', 'status', 'category')
+
+    def resolve_host(self, info):
+        return get_loaders(info).user_by_id.load(self.host_id)
+
+    def resolve_reviews(self, info, first=None):
+        return get_loaders(info).reviews_by_listing.load(self.pk)[:_page_size(first)]
+
+    def resolve_bookings(self, info, first=None):
+        return get_loaders(info).bookings_by_listing.load(self.pk)[:_page_size(first)]
+
+
+class BookingType(DjangoObjectType):
+    """GraphQL type for Booking."""
+    listing = graphene.Field(ListingType)
+    user = graphene.Field(UserType)
+    reviews = _related_list(lambda: ReviewType)
+    payments = _related_list(lambda: PaymentType)
+
+    class Meta:
+        model = Booking
+        fields = ('booking_id', 'start_date', 'end_date', 'created_at', 'updated_at', 'booking_status',
+                  'total_price', 'guest_count', 'special_requests', 'payment_status', 'payment_method',
+                  'cancellation_policy')
+
+    def resolve_listing(self, info):
+        return get_loaders(info).listing.load(self.listing_id_id)
+
+    def resolve_user(self, info):
+        return get_loaders(info).user_by_id.load(self.user_id)
+
+    def resolve_reviews(self, info, first=None):
+        return get_loaders(info).reviews_by_booking.load(self.pk)[:_page_size(first)]
+
+    def resolve_payments(self, info, first=None):
+        return get_loaders(info).payments_by_booking.load(self.pk)[:_page_size(first)]
+
+
+class ReviewType(DjangoObjectType):
+    """GraphQL type for Review."""
+    listing = graphene.Field(ListingType)
+    user = graphene.Field(UserType)
+    booking = graphene.Field(BookingType)
+
+    class Meta:
+        model = Review
+        fields = ('review_id', 'rating', 'comment', 'created_at', 'updated_at', 'approved', 'response')
+        convert_choices_to_enum = False
+
+    def resolve_listing(self, info):
+        return get_loaders(info).listing.load(self.listing_id_id)
+
+    def resolve_user(self, info):
+        return get_loaders(info).user_by_id.load(self.user_id)
+
+    def resolve_booking(self, info):
+        return get_loaders(info).booking.load(self.booking_id_id)
+
+
+class PaymentType(DjangoObjectType):
+    """GraphQL type for Payment."""
+    booking = graphene.Field(BookingType)
+    user = graphene.Field(UserType)
+
+    class Meta:
+        model = Payment
+        fields = ('payment_id', 'chapa_tx_ref', 'amount', 'currency', 'payment_date', 'payment_method',
+                  'status')
+
+    def resolve_booking(self, info):
+        return get_loaders(info).booking.load(self.booking_id_id)
+
+    def resolve_user(self, info):
+        return get_loaders(info).user_by_id.load(self.user_id)
+
+
+class Query(graphene.ObjectType):
+    """Root query type."""
+    listings = graphene.List(graphene.NonNull(ListingType), search=graphene.String(),
+                             first=graphene.Int(), offset=graphene.Int(default_value=0))
+    listing = graphene.Field(ListingType, listing_id=graphene.UUID(required=True))
+    my_bookings = graphene.List(graphene.NonNull(BookingType), first=graphene.Int(),
+                                offset=graphene.Int(default_value=0))
+    my_payments = graphene.List(graphene.NonNull(PaymentType), first=graphene.Int(),
+                                offset=graphene.Int(default_value=0))
+
+    def resolve_listings(self, info, search=None, first=None, offset=0):
+        queryset = Listing.objects.all()
+        if search:
+            queryset = queryset.filter(title__icontains=search)
+        offset = max(offset, 0)
+        return get_loaders(info).track(queryset[offset:offset + _page_size(first)])
+
+    def resolve_listing(self, info, listing_id):
+        return get_loaders(info).listing.load(listing_id)
+
+    def resolve_my_bookings(self, info, first=None, offset=0):
+        queryset = Booking.objects.filter(user_id=info.context.user.id)
+        offset = max(offset, 0)
+        return get_loaders(info).track(queryset[offset:offset + _page_size(first)])
+
+    def resolve_my_payments(self, info, first=None, offset=0):
+        queryset = Payment.objects.filter(user_id=info.context.user.id)
+        offset = max(offset, 0)
+        return get_loaders(info).track(queryset[offset:offset + _page_size(first)])
+
+
+schema = graphene.Schema(query=Query)
+
+
+class QueryComplexityRule(ValidationRule):
+    """Reject operations whose estimated cost exceeds ``GRAPHQL_MAX_COMPLEXITY``.
+
+    Every field costs one; the selections under a list field are multiplied
+    by its ``first`` argument, or by ``GRAPHQL_DEFAULT_LIST_SIZE`` when it is
+    omitted. Variables are not known during validation, so ``first: $n``
+    counts as ``GRAPHQL_MAX_LIST_SIZE``.
+    """
+
+    def enter_operation_definition(self, node, *args):
+        root_type = self.context.schema.get_root_type(node.operation)
+        if root_type is None:
+            return
+        cost = self.selection_cost(node.selection_set, root_type, frozenset())
+        if cost > settings.GRAPHQL_MAX_COMPLEXITY:
+            self.report_error(GraphQLError(
+                f"Query complexity {cost} exceeds the maximum of {settings.GRAPHQL_MAX_COMPLEXITY}.",
+                node,
+            ))
+
+    def selection_cost(self, selection_set, parent_type, visited_fragments) -> int:
+        cost = 0
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                if selection.name.value.startswith('__'):
+                    continue
+                field = getattr(parent_type, 'fields', {}).get(selection.name.value)
+                if field is None:
+                    continue
+                cost += 1
+                if selection.selection_set:
+                    child_cost = self.selection_cost(selection.selection_set, get_named_type(field.type),
+                                                     visited_fragments)
+                    cost += self.list_size(selection, field) * child_cost
+            elif isinstance(selection, FragmentSpreadNode):
+                name = selection.name.value
+                fragment = self.context.get_fragment(name)
+                if fragment is None or name in visited_fragments:
+                    continue
+                fragment_type = self.context.schema.get_type(fragment.type_condition.name.value)
+                cost += self.selection_cost(fragment.selection_set, fragment_type or parent_type,
+                                            visited_fragments | {name})
+            elif isinstance(selection, InlineFragmentNode):
+                fragment_type = parent_type
+                if selection.type_condition:
+                    fragment_type = self.context.schema.get_type(selection.type_condition.name.value)
+                cost += self.selection_cost(selection.selection_set, fragment_type or parent_type,
+                                            visited_fragments)
+        return cost
+
+    @staticmethod
+    def list_size(selection, field) -> int:
+        if not is_list_type(get_nullable_type(field.type)):
+            return 1
+        for argument in selection.arguments:
+            if argument.name.value != 'first':
+                continue
+            if isinstance(argument.value, IntValueNode):
+                return _page_size(int(argument.value.value))
+            if isinstance(argument.value, NullValueNode):
+                break
+            return settings.GRAPHQL_MAX_LIST_SIZE
+        return settings.GRAPHQL_DEFAULT_LIST_SIZE
+
+
+def validation_rules():
+    """Validation rules applied to every GraphQL request on top of the spec rules."""
+    return [depth_limit_validator(max_depth=settings.GRAPHQL_MAX_DEPTH), QueryComplexityRule]
@@ -1,5 +1,6 @@
 from rest_framework import serializers
-from .models import Listing, Booking, Review, Payment
+from .fx import get_rates
+from .models import Listing, Booking, Review, Payment, ArchivedBooking
 
 
 class ListingSerializer(serializers.ModelSerializer):
@@ -9,7 +10,7 @@ class ListingSerializer(serializers.ModelSerializer):
         """Meta class for Listing Serializer."""
         model = Listing
         fields = '__all__'
-        read_only_fields = ('created_at', 'updated_at')
+        read_only_fields = ('created_at', 'updated_at', 'geohash', 'price_per_night_base')
         extra_kwargs = {
             'listing_id': {'read_only': True},
             'host': {'read_only': True},
@@ -20,6 +21,8 @@ class ListingSerializer(serializers.ModelSerializer):
             'county': {'required': True},
             'town': {'required': True},
             'street': {'required': True},
+            'latitude': {'required': False, 'min_value': -90, 'max_value': 90},
+            'longitude': {'required': False, 'min_value': -180, 'max_value': 180},
             'max_guests': {'required': True, 'min_value': 1},
             'availability': {'required': True},
             'status': {'required': True},
@@ -40,8 +43,17 @@ class ListingSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Invalid category. Choose from 'apartment', 'house', 'cottage', 'villa', 'bungalow', or 'studio'.")
         if data['availability'] not in [True, False]:
             raise serializers.ValidationError("Availability must be a boolean value.")
+        if (data.get('latitude') is None) != (data.get('longitude') is None):
+            raise serializers.ValidationError("Latitude and longitude must be given together.")
         return data
 
+    def validate_currency(self, value: str) -> str:
+        """Currencies must have an exchange rate so the listing can be priced in the base currency."""
+        value = value.upper()
+        if value not in get_rates():
+            raise serializers.ValidationError(f"Unsupported currency '{value}'.")
+        return value
+
 
 class BookingSerializer(serializers.ModelSerializer):
     """Serializer for Booking model."""
@@ -131,3 +143,13 @@ class PaymentSerializer(serializers.ModelSerializer):
             'status': {'required': True},
             'transaction_id': {'required': False, 'allow_blank': True}
         }
+
+
+class ArchivedBookingSerializer(serializers.ModelSerializer):
+    """Read-only serializer for archived bookings."""
+
+    class Meta:
+        """Meta class for ArchivedBooking Serializer."""
+        model = ArchivedBooking
+        exclude = ('archived_at',)
+        read_only_fields = [field.name for field in ArchivedBooking._meta.fields]
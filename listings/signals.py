@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .autocomplete import autocomplete
+from .models import Listing
+
+
+@receiver(post_save, sender=Listing)
+def index_saved_listing(sender, instance, **kwargs):
+    """Keep the autocomplete index current when a listing is saved."""
+    autocomplete.listing_saved(instance)
+
+
+@receiver(post_delete, sender=Listing)
+def unindex_deleted_listing(sender, instance, **kwargs):
+    """Drop a deleted listing from the autocomplete index."""
+    autocomplete.listing_deleted(instance)
@@ -1,9 +1,72 @@
-from celery import shared_task
+from celery import Task, shared_task
+from django.conf import settings
+from django.core.cache import cache
 from django.core.mail import send_mail
 
-@shared_task
+from .archive import archive_bookings
+from .fx import load_rates, update_rates
+
+
+class IdempotentTask(Task):
+    """Task that runs its body at most once per task id.
+
+    Outbox messages are published with their dedup key as the task id, so a
+    redelivered or republished message finds its id in the registry (the
+    Django cache) and becomes a no-op. A duplicate that arrives while the
+    first run is still in progress is retried later instead of running twice.
+    Across prefork children and hosts this needs a shared cache (see the
+    ``listings.W001`` check).
+    """
+    ignore_result = True
+    in_progress_timeout = 10 * 60
+    in_progress_retry_delay = 30
+
+    def registry_key(self, task_id: str) -> str:
+        """Cache key recording the state of ``task_id``."""
+        return f"celery:idempotency:{self.name}:{task_id}"
+
+    def __call__(self, *args, **kwargs):
+        task_id = self.request.id
+        if task_id is None:
+            # Called directly rather than through a worker.
+            return super().__call__(*args, **kwargs)
+
+        key = self.registry_key(task_id)
+        if not cache.add(key, 'running', self.in_progress_timeout):
+            if cache.get(key) == 'done':
+                return None
+            raise self.retry(countdown=self.in_progress_retry_delay, max_retries=None)
+
+        try:
+            result = super().__call__(*args, **kwargs)
+        except BaseException:
+            cache.delete(key)
+            raise
+        cache.set(key, 'done', settings.CELERY_TASK_IDEMPOTENCY_TTL)
+        return result
+
+
+@shared_task(base=IdempotentTask)
 def send_booking_confirmation_email(to_email, booking_id):
     subject = 'Booking Confirmation'
     message = f'Your booking with ID {booking_id} has been confirmed!'
     from_email = 'your_email@example.com'
-    send_mail(subject, message, from_email, [to_email])
\ No newline at end of file
+    send_mail(subject, message, from_email, [to_email])
+
+
+@shared_task(base=IdempotentTask)
+def send_payment_confirmation_email(to_email, booking_id):
+    subject = 'Payment Confirmation'
+    message = f'Your payment for booking with ID {booking_id} has been received!'
+    from_email = 'your_email@example.com'
+    send_mail(subject, message, from_email, [to_email])
+
+
+@shared_task(ignore_result=True)
+def archive_completed_bookings():
+    archive_bookings()
+
+
+@shared_task(ignore_result=True)
+def refresh_exchange_rates():
+    update_rates(load_rates())
@@ -1,3 +1,764 @@
-from django.test import TestCase
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
 
-# Create your tests here.
+from celery import Celery
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from . import chapa
+from .archive import archive_bookings
+from .fx import update_rates
+from .autocomplete import ListingAutocomplete, autocomplete
+from .checks import check_idempotency_lock_timeout, check_shared_cache
+from .geo import EARTH_RADIUS_KM, covering_cells, encode
+from .models import (Listing, Booking, Review, Payment, OutboxMessage, ArchivedBooking, ArchivedReview,
+                     ArchivedPayment, ExchangeRate)
+from .outbox import enqueue, publish_pending
+from .serializers import ListingSerializer
+from .tasks import send_booking_confirmation_email
+from .throttling import SearchThrottle, TokenBucket, TokenBucketThrottle, load_monitor
+from alx_travel_app import docs
+from alx_travel_app.celery import app as celery_app
+
+
+class ListingsTestCase(TestCase):
+    """Base class with a logged-in user and helpers to create listings and bookings."""
+
+    def setUp(self):
+        cache.clear()
+        TokenBucketThrottle._buckets.clear()
+        self.user = User.objects.create_user(username='alice', email='alice@example.com', password='secret')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_listing(self, **fields):
+        values = {
+            'title': 'Cozy Beach House',
+            'description': 'Near the sea',
+            'price_per_night': Decimal('100.00'),
+            'currency': 'USD',
+            'county': 'Mombasa',
+            'town': 'Nyali',
+            'street': 'Beach Road',
+            'host': self.user,
+        }
+        values.update(fields)
+        return Listing.objects.create(**values)
+
+    def create_booking(self, listing, user=None, **fields):
+        values = {
+            'listing_id': listing,
+            'user': user or self.user,
+            'start_date': date(2024, 1, 1),
+            'end_date': date(2024, 1, 3),
+            'total_price': Decimal('200.00'),
+        }
+        values.update(fields)
+        return Booking.objects.create(**values)
+
+    def booking_payload(self, listing, **fields):
+        payload = {
+            'listing_id': str(listing.listing_id),
+            'start_date': '2030-01-01',
+            'end_date': '2030-01-03',
+            'total_price': '200.00',
+            'guest_count': 2,
+            'booking_status': 'pending',
+            'payment_status': 'paid',
+            'payment_method': 'credit_card',
+            'cancellation_policy': 'flexible',
+        }
+        payload.update(fields)
+        return payload
+
+
+class OutboxTests(ListingsTestCase):
+    """user-026: tasks are recorded in the booking's transaction and relayed later."""
+
+    def test_booking_creation_writes_outbox_message(self):
+        response = self.client.post('/api/api/booking/', self.booking_payload(self.create_listing()), format='json')
+
+        self.assertEqual(response.status_code, 201)
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.dedup_key, f"booking-confirmation:{response.data['booking_id']}")
+        self.assertEqual(message.task_name, 'listings.tasks.send_booking_confirmation_email')
+        self.assertIsNone(message.published_at)
+
+    def test_outbox_message_rolls_back_with_booking(self):
+        listing = self.create_listing()
+        with mock.patch('listings.views.enqueue', side_effect=DatabaseError('outbox unavailable')):
+            with self.assertRaises(DatabaseError):
+                self.client.post('/api/api/booking/', self.booking_payload(listing), format='json')
+
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(OutboxMessage.objects.exists())
+
+    def test_enqueue_is_deduplicated(self):
+        first = enqueue('listings.tasks.send_booking_confirmation_email', 'a@b.c', '1', dedup_key='k')
+        second = enqueue('listings.tasks.send_booking_confirmation_email', 'a@b.c', '1', dedup_key='k')
+        self.assertEqual(first.pk, second.pk)
+
+    def test_publish_pending_sends_with_dedup_key_as_task_id(self):
+        enqueue('listings.tasks.send_booking_confirmation_email', 'a@b.c', '1', dedup_key='booking-confirmation:1')
+        app = Celery(broker='memory://')
+
+        with mock.patch.object(app, 'send_task') as send_task:
+            self.assertEqual(publish_pending(app=app), 1)
+            self.assertEqual(publish_pending(app=app), 0)
+
+        send_task.assert_called_once()
+        self.assertEqual(send_task.call_args.kwargs['task_id'], 'booking-confirmation:1')
+        self.assertIsNotNone(OutboxMessage.objects.get().published_at)
+
+
+class TaskQueueTests(TestCase):
+    """user-027: queue-specific acknowledgement and idempotent email tasks."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_acks_late_follows_the_task_queue(self):
+        self.assertTrue(celery_app.tasks['listings.tasks.send_payment_confirmation_email'].acks_late)
+        self.assertTrue(celery_app.tasks['listings.tasks.send_booking_confirmation_email'].acks_late)
+        self.assertFalse(celery_app.tasks['listings.tasks.archive_completed_bookings'].acks_late)
+
+    def test_idempotent_task_runs_once_per_task_id(self):
+        send_booking_confirmation_email.apply(args=['a@b.c', '1'], task_id='booking-confirmation:1')
+        send_booking_confirmation_email.apply(args=['a@b.c', '1'], task_id='booking-confirmation:1')
+        send_booking_confirmation_email.apply(args=['a@b.c', '2'], task_id='booking-confirmation:2')
+
+        self.assertEqual(len(mail.outbox), 2)
+
+
+class ArchiveTests(ListingsTestCase):
+    """user-028: old bookings move to the archive tables and reads fall through to them."""
+
+    def setUp(self):
+        super().setUp()
+        self.listing = self.create_listing()
+        self.old = self.create_booking(self.listing, start_date=date(2020, 1, 1), end_date=date(2020, 1, 5))
+        self.recent = self.create_booking(self.listing, start_date=date.today(), end_date=date.today())
+        Review.objects.create(listing_id=self.listing, user=self.user, booking_id=self.old, rating=5)
+        Payment.objects.create(booking_id=self.old, user=self.user, chapa_tx_ref='tx-old', amount=Decimal('200.00'))
+
+    def test_archive_moves_old_bookings_with_reviews_and_payments(self):
+        self.assertEqual(archive_bookings(months=12, batch_size=1), 1)
+
+        self.assertEqual(list(Booking.objects.values_list('pk', flat=True)), [self.recent.pk])
+        self.assertEqual(ArchivedBooking.objects.get().pk, self.old.pk)
+        self.assertFalse(Review.objects.exists())
+        self.assertFalse(Payment.objects.exists())
+        self.assertEqual(ArchivedReview.objects.count(), 1)
+        self.assertEqual(ArchivedPayment.objects.get().chapa_tx_ref, 'tx-old')
+
+    def test_retrieve_and_history_fall_through_to_the_archive(self):
+        archive_bookings(months=12)
+
+        response = self.client.get(f'/api/api/booking/{self.old.pk}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['booking_id'], str(self.old.pk))
+
+        history = self.client.get('/api/api/booking/history/')
+        self.assertEqual([booking['booking_id'] for booking in history.data], [str(self.recent.pk), str(self.old.pk)])
+
+    def test_retrieve_unknown_or_malformed_id_is_404(self):
+        self.assertEqual(self.client.get('/api/api/booking/00000000-0000-0000-0000-000000000000/').status_code, 404)
+        self.assertEqual(self.client.get('/api/api/booking/not-a-uuid/').status_code, 404)
+
+
+class GraphQLTests(ListingsTestCase):
+    """user-029: batched GraphQL resolvers scoped to the requesting user."""
+
+    def setUp(self):
+        super().setUp()
+        self.other = User.objects.create_user(username='bob', email='bob@example.com', password='secret')
+        self.listings = [self.create_listing(title=f'Listing {i}') for i in range(3)]
+        for listing in self.listings:
+            for day, user in enumerate([self.user, self.other], start=1):
+                booking = self.create_booking(listing, user=user, start_date=date(2024, 1, day),
+                                              end_date=date(2024, 1, day + 1))
+                Review.objects.create(listing_id=listing, user=user, booking_id=booking)
+                Payment.objects.create(booking_id=booking, user=user, chapa_tx_ref=f'tx-{booking.pk}',
+                                       amount=Decimal('200.00'))
+
+    def query(self, query, user=None, **variables):
+        client = APIClient()
+        client.force_authenticate(user or self.user)
+        return client.post('/api/graphql/', {'query': query, 'variables': variables}, format='json')
+
+    def test_nested_query_uses_a_query_per_relation(self):
+        query = """{ listings(first: 10) { title host { username } reviews { user { username } booking { payments { amount } } }
+                     bookings { startDate } } myBookings { listing { title } payments { amount } } }"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.query(query)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('errors', response.json())
+        self.assertEqual(len(response.json()['data']['listings']), 3)
+        self.assertLessEqual(len(queries.captured_queries), 9)
+
+    def test_other_users_bookings_and_payments_are_not_reachable(self):
+        query = "{ listings(first: 5) { reviews { user { username } booking { totalPrice payments { chapaTxRef } } } } }"
+        data = self.query(query, user=self.other).json()['data']
+
+        for listing in data['listings']:
+            for review in listing['reviews']:
+                if review['user']['username'] == 'bob':
+                    self.assertEqual(len(review['booking']['payments']), 1)
+                else:
+                    self.assertIsNone(review['booking'])
+        own_refs = {f'tx-{pk}' for pk in Booking.objects.filter(user=self.other).values_list('pk', flat=True)}
+        refs = {payment['chapaTxRef'] for listing in data['listings'] for review in listing['reviews']
+                if review['booking'] for payment in review['booking']['payments']}
+        self.assertEqual(refs, own_refs)
+
+    def test_nested_lists_honour_first(self):
+        data = self.query("{ listings { reviews(first: 1) { rating } } }").json()['data']
+        self.assertTrue(all(len(listing['reviews']) == 1 for listing in data['listings']))
+
+    @override_settings(GRAPHQL_MAX_COMPLEXITY=200)
+    def test_complexity_counts_variables_as_the_largest_page(self):
+        query = "query ($n: Int) { listings(first: $n) { reviews(first: 2) { rating } } }"
+        response = self.query(query, n=1)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('complexity', response.json()['errors'][0]['message'])
+        self.assertEqual(self.query("{ listings(first: 1) { reviews(first: 2) { rating } } }").status_code, 200)
+
+
+@override_settings(RATE_LIMITS={'search': {'capacity': 4, 'refill_rate': 0.01},
+                                'booking_create': {'capacity': 10, 'refill_rate': 10 / 60},
+                                'payment_initiate': {'capacity': 5, 'refill_rate': 5 / 60}})
+class ThrottleTests(ListingsTestCase):
+    """user-030: token bucket limits and load shedding."""
+
+    def test_search_is_limited_with_retry_after(self):
+        statuses = [self.client.get('/api/api/listing/?search=beach').status_code for _ in range(5)]
+
+        self.assertEqual(statuses, [200, 200, 200, 200, 429])
+        response = self.client.get('/api/api/listing/?search=beach')
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(self.client.get('/api/api/listing/').status_code, 200)
+
+    def test_leases_keep_most_checks_off_the_cache(self):
+        bucket = TokenBucket('booking_create', capacity=10, refill_rate=10 / 60)
+        with mock.patch('listings.throttling.cache', wraps=cache) as shared:
+            waits = [bucket.take('user:1') for _ in range(5)]
+
+        self.assertEqual(waits, [0] * 5)
+        self.assertEqual(shared.get.call_count, 2)
+
+    def test_rejections_are_remembered_locally(self):
+        bucket = TokenBucket('payment_initiate', capacity=5, refill_rate=5 / 60)
+        for _ in range(5):
+            self.assertEqual(bucket.take('user:1'), 0)
+        with mock.patch('listings.throttling.cache', wraps=cache) as shared:
+            waits = [bucket.take('user:1') for _ in range(3)]
+
+        self.assertTrue(all(wait > 0 for wait in waits))
+        self.assertEqual(shared.get.call_count, 1)
+
+    def test_processes_never_spend_the_same_tokens(self):
+        buckets = [TokenBucket('booking_create', capacity=10, refill_rate=1e-6) for _ in range(4)]
+        granted = []
+
+        def drain(bucket):
+            granted.extend(wait == 0 for wait in (bucket.take('user:1') for _ in range(10)))
+
+        def slow_get(*args, **kwargs):
+            # Widen the window between reading and writing the shared bucket.
+            value = cache.get(*args, **kwargs)
+            time.sleep(0.002)
+            return value
+
+        threads = [threading.Thread(target=drain, args=(bucket,)) for bucket in buckets]
+        with mock.patch('listings.throttling.cache', wraps=cache) as shared:
+            shared.get.side_effect = slow_get
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(sum(granted), 10)
+
+    def test_overloaded_process_sheds_with_503(self):
+        with override_settings(LOAD_SHEDDING={'MAX_IN_FLIGHT': 0, 'P95_LATENCY_MS': 1500, 'WINDOW': 200,
+                                              'RETRY_AFTER': 5}):
+            response = self.client.get('/api/api/listing/?search=beach')
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+
+    def test_busy_bucket_lock_fails_open(self):
+        bucket = TokenBucket('payment_initiate', capacity=5, refill_rate=5 / 60)
+        bucket.lock_wait = 0.01
+        cache.set('ratelimit:payment_initiate:user:1:lock', 1, 60)
+
+        self.assertEqual([bucket.take('user:1') for _ in range(3)], [0, 0, 0])
+        cache.delete('ratelimit:payment_initiate:user:1:lock')
+        self.assertEqual(bucket.take('user:1'), 0)
+
+    def test_forwarded_for_does_not_pick_the_ip_bucket(self):
+        request = RequestFactory().get('/', HTTP_X_FORWARDED_FOR='203.0.113.7', REMOTE_ADDR='10.0.0.1')
+
+        self.assertEqual(SearchThrottle().get_ident(request), '10.0.0.1')
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}):
+            self.assertEqual(SearchThrottle().get_ident(request), '203.0.113.7')
+
+    def test_slow_process_sheds_with_429(self):
+        with mock.patch.object(load_monitor, 'p95_ms', 10_000):
+            response = self.client.get('/api/api/listing/?search=beach')
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['Retry-After'], '5')
+
+
+class CurrencyTests(ListingsTestCase):
+    """user-035: prices compared and ordered across currencies in the base currency."""
+
+    def setUp(self):
+        super().setUp()
+        ExchangeRate.objects.create(currency='KES', rate=Decimal('130'))
+        ExchangeRate.objects.create(currency='ETB', rate=Decimal('57'))
+        self.usd = self.create_listing(title='Dollar Flat', price_per_night=Decimal('80.00'))
+        self.kes = self.create_listing(title='Shilling Cottage', price_per_night=Decimal('13000.00'), currency='KES')
+        self.etb = self.create_listing(title='Birr Lodge', price_per_night=Decimal('2850.00'), currency='ETB')
+
+    def titles(self, query):
+        response = self.client.get(f'/api/api/listing/?{query}')
+        self.assertEqual(response.status_code, 200)
+        return [listing['title'] for listing in response.data]
+
+    def test_listings_store_their_base_currency_price(self):
+        self.assertEqual(self.kes.price_per_night_base, Decimal('100.00'))
+        self.assertEqual(self.etb.price_per_night_base, Decimal('50.00'))
+
+    def test_price_filters_compare_across_currencies(self):
+        self.assertEqual(set(self.titles('min_price=60&max_price=90')), {'Dollar Flat'})
+        self.assertEqual(set(self.titles('min_price=10000&price_currency=kes')), {'Dollar Flat', 'Shilling Cottage'})
+        self.assertEqual(self.client.get('/api/api/listing/?min_price=1&price_currency=XYZ').status_code, 400)
+        self.assertEqual(self.client.get('/api/api/listing/?max_price=-1').status_code, 400)
+
+    def test_ordering_by_price_uses_the_base_currency(self):
+        self.assertEqual(self.titles('ordering=price'), ['Birr Lodge', 'Dollar Flat', 'Shilling Cottage'])
+        self.assertEqual(self.titles('ordering=-price'), ['Shilling Cottage', 'Dollar Flat', 'Birr Lodge'])
+
+    def test_rate_changes_reprice_listings_with_one_update_per_currency(self):
+        with CaptureQueriesContext(connection) as queries:
+            repriced = update_rates({'KES': Decimal('100'), 'ETB': Decimal('57')})
+
+        self.assertEqual(repriced, 1)
+        # KES, ETB and the base currency.
+        self.assertEqual(sum(query['sql'].startswith('UPDATE "listings_listing"') for query in queries.captured_queries),
+                         3)
+        self.kes.refresh_from_db()
+        self.assertEqual(self.kes.price_per_night_base, Decimal('130.00'))
+        self.assertEqual(self.titles('ordering=-price')[0], 'Shilling Cottage')
+
+    def test_saves_ignore_a_stale_rates_cache(self):
+        cache.set('fx:rates', {'USD': Decimal(1), 'KES': Decimal('100'), 'ETB': Decimal('57')})
+
+        listing = self.create_listing(title='Fresh Rate Flat', price_per_night=Decimal('6500.00'), currency='KES')
+        self.assertEqual(listing.price_per_night_base, Decimal('50.00'))
+
+    def test_refresh_repairs_base_prices_even_when_rates_are_unchanged(self):
+        Listing.objects.filter(pk=self.kes.pk).update(price_per_night_base=Decimal('130.00'))
+        Listing.objects.filter(pk=self.usd.pk).update(price_per_night_base=None)
+
+        repriced = update_rates({'KES': Decimal('130'), 'ETB': Decimal('57')})
+
+        self.assertEqual(repriced, 2)
+        self.kes.refresh_from_db()
+        self.usd.refresh_from_db()
+        self.assertEqual((self.kes.price_per_night_base, self.usd.price_per_night_base),
+                         (Decimal('100.00'), Decimal('80.00')))
+        self.assertEqual(update_rates({'KES': Decimal('130'), 'ETB': Decimal('57')}), 0)
+
+    def test_refresh_command_loads_the_fixture_rates(self):
+        call_command('refresh_exchange_rates', stdout=mock.Mock())
+
+        self.assertTrue(ExchangeRate.objects.filter(currency='EUR').exists())
+        self.kes.refresh_from_db()
+        self.assertEqual(self.kes.price_per_night_base,
+                         (self.kes.price_per_night / ExchangeRate.objects.get(currency='KES').rate).quantize(
+                             Decimal('0.01')))
+
+    def test_currency_must_have_a_rate(self):
+        serializer = ListingSerializer()
+        self.assertEqual(serializer.validate_currency('kes'), 'KES')
+        with self.assertRaises(serializers.ValidationError):
+            serializer.validate_currency('XYZ')
+
+    @override_settings(CHAPA_SECRET_KEY='test-key')
+    def test_payments_in_unsupported_currencies_are_converted_for_chapa(self):
+        booking = self.create_booking(self.kes, total_price=Decimal('26000.00'))
+        checkout = mock.Mock(status_code=200, json=lambda: {'data': {'checkout_url': 'https://checkout'}})
+        with mock.patch('requests.post', return_value=checkout) as post:
+            response = self.client.post('/api/payments/initiate/', {'booking_id': str(booking.pk)}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        sent = post.call_args.kwargs['json']
+        self.assertEqual((sent['currency'], sent['amount']), ('ETB', '11400.00'))
+        payment = Payment.objects.get()
+        self.assertEqual((payment.currency, payment.amount), ('ETB', Decimal('11400.00')))
+
+
+class AutocompleteTests(ListingsTestCase):
+    """user-034: prefix suggestions from the in-process index."""
+
+    def setUp(self):
+        super().setUp()
+        autocomplete.built_at = None
+        self.beach = self.create_listing(title='Cozy Beach House', town='Nyali', county='Mombasa')
+        self.villa = self.create_listing(title='Beachfront Villa', town='Diani', county='Kwale')
+        self.create_booking(self.villa)
+
+    def suggest(self, q, **params):
+        response = self.client.get('/api/api/listing/autocomplete/', {'q': q, **params})
+        self.assertEqual(response.status_code, 200)
+        return [suggestion['text'] for suggestion in response.data]
+
+    def test_matches_word_prefixes_most_booked_first(self):
+        self.assertEqual(self.suggest('bea'), ['Beachfront Villa', 'Cozy Beach House'])
+        self.assertEqual(self.suggest('beach h'), ['Cozy Beach House'])
+        self.assertEqual(self.suggest('mom'), ['Mombasa'])
+        self.assertEqual(self.suggest('bea', limit=1), ['Beachfront Villa'])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.suggest('bea')
+        self.beach.title = 'Lakeside Cabin'
+        self.beach.save()
+        self.villa.delete()
+
+        self.assertEqual(self.suggest('bea'), [])
+        self.assertEqual(self.suggest('lake'), ['Lakeside Cabin'])
+
+    def test_warm_builds_the_index_off_the_request_path(self):
+        index = ListingAutocomplete()
+        rows = [(self.beach.pk, 'Cozy Beach House', 'Nyali', 'Mombasa', 0)]
+        with mock.patch.object(index, 'rows', return_value=rows) as load:
+            index.warm()
+            self.assertEqual([s['text'] for s in index.search('cozy')], ['Cozy Beach House'])
+
+        self.assertIsNotNone(index.built_at)
+        self.assertEqual(load.call_count, 1)
+
+
+@override_settings(IDEMPOTENCY_WAIT_TIMEOUT=0.2, CHAPA_SECRET_KEY='test-key')
+class IdempotencyTests(ListingsTestCase):
+    """user-033: Idempotency-Key retries of booking creation and payment initiation."""
+
+    def setUp(self):
+        super().setUp()
+        self.listing = self.create_listing()
+
+    def post_booking(self, key, **fields):
+        return self.client.post('/api/api/booking/', self.booking_payload(self.listing, **fields), format='json',
+                                HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_stored_response(self):
+        first = self.post_booking('key-1')
+        retry = self.post_booking('key-1')
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry.data), (201, first.data))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_reusing_a_key_for_a_different_body_is_422(self):
+        self.post_booking('key-1')
+        response = self.post_booking('key-1', guest_count=3)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_duplicate_during_a_chapa_call_does_not_call_chapa_again(self):
+        booking = self.create_booking(self.listing)
+        duplicates = []
+
+        def chapa_post(*args, **kwargs):
+            # A client retry arriving while the first request waits on Chapa.
+            duplicates.append(self.client.post('/api/payments/initiate/', {'booking_id': str(booking.pk)},
+                                               format='json', HTTP_IDEMPOTENCY_KEY='pay-1'))
+            return mock.Mock(status_code=200, json=lambda: {'data': {'checkout_url': 'https://checkout'}})
+
+        with mock.patch('requests.post', side_effect=chapa_post) as post:
+            response = self.client.post('/api/payments/initiate/', {'booking_id': str(booking.pk)},
+                                        format='json', HTTP_IDEMPOTENCY_KEY='pay-1')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(duplicates[0].status_code, 409)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    def test_chapa_failure_does_not_burn_the_key(self):
+        booking = self.create_booking(self.listing)
+        outage = mock.Mock(status_code=503)
+        checkout = mock.Mock(status_code=200, json=lambda: {'data': {'checkout_url': 'https://checkout'}})
+
+        with mock.patch('requests.post', side_effect=[outage, checkout]) as post:
+            responses = [self.client.post('/api/payments/initiate/', {'booking_id': str(booking.pk)},
+                                          format='json', HTTP_IDEMPOTENCY_KEY='pay-1') for _ in range(2)]
+
+        self.assertEqual([response.status_code for response in responses], [502, 200])
+        self.assertNotIn('Idempotent-Replayed', responses[1])
+        self.assertEqual(post.call_count, 2)
+        self.assertEqual(Payment.objects.count(), 1)
+
+    @override_settings(RATE_LIMITS={'booking_create': {'capacity': 1, 'refill_rate': 1e-6}})
+    def test_replays_do_not_spend_rate_limit_tokens(self):
+        self.assertEqual(self.post_booking('key-1').status_code, 201)
+
+        for _ in range(3):
+            self.assertEqual(self.post_booking('key-1').status_code, 201)
+        self.assertEqual(self.post_booking('key-2', guest_count=3).status_code, 429)
+
+    def test_checks_warn_about_process_local_caches(self):
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            self.assertEqual([message.id for message in check_shared_cache(None)], ['listings.W001'])
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'}}):
+            self.assertEqual(check_shared_cache(None), [])
+
+    def test_checks_reject_a_lock_shorter_than_a_chapa_call(self):
+        self.assertEqual(check_idempotency_lock_timeout(None), [])
+        with override_settings(IDEMPOTENCY_LOCK_TIMEOUT=30, CHAPA_TIMEOUT=30):
+            self.assertEqual([message.id for message in check_idempotency_lock_timeout(None)], ['listings.E001'])
+
+
+class NearbyListingTests(ListingsTestCase):
+    """user-031: radius search over geohash cells."""
+
+    center = (-1.2921, 36.8219)
+
+    def setUp(self):
+        super().setUp()
+        # A ring of listings every 10 degrees of bearing at 1 to 30 km from the centre.
+        self.distances = {}
+        for distance in (1, 4, 9, 16, 30):
+            for bearing in range(0, 360, 10):
+                latitude, longitude = self.offset(distance, bearing)
+                listing = self.create_listing(title=f'{distance} km at {bearing}', latitude=latitude,
+                                              longitude=longitude)
+                self.distances[str(listing.pk)] = distance
+
+    def offset(self, distance_km, bearing):
+        latitude = self.center[0] + distance_km / 111.2 * math.cos(math.radians(bearing))
+        longitude = self.center[1] + distance_km / (111.2 * math.cos(math.radians(self.center[0]))) * math.sin(
+            math.radians(bearing))
+        return latitude, longitude
+
+    def test_geohash_is_kept_in_sync(self):
+        listing = self.create_listing(latitude=57.64911, longitude=10.40744)
+        self.assertEqual(encode(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertTrue('u4pruydqqvj'.startswith(listing.geohash))
+
+        listing.latitude, listing.longitude = None, None
+        listing.save(update_fields=['latitude', 'longitude'])
+        listing.refresh_from_db()
+        self.assertIsNone(listing.geohash)
+
+    def test_covering_cells_contain_the_circle(self):
+        cells = covering_cells(*self.center, 5)
+        for bearing in range(0, 360, 15):
+            geohash = encode(*self.offset(4.9, bearing))
+            self.assertTrue(any(geohash.startswith(cell) for cell in cells), bearing)
+        # Near a pole the circle spans every longitude, so no cell block covers it.
+        self.assertEqual(covering_cells(89.99, 0.0, 50), [''])
+
+    def test_radius_search_returns_listings_within_radius_nearest_first(self):
+        for radius in (5, 10, 20):
+            response = self.client.get(f'/api/api/listing/?near={self.center[0]},{self.center[1]}&radius_km={radius}')
+
+            self.assertEqual(response.status_code, 200)
+            distances = [self.distances[listing['listing_id']] for listing in response.data]
+            self.assertEqual(len(distances), sum(1 for d in self.distances.values() if d <= radius))
+            self.assertEqual(distances, sorted(distances))
+
+    def test_radius_edge_is_exact_at_any_latitude(self):
+        for center in (self.center, (60.0, 10.0), (-75.0, 120.0)):
+            Listing.objects.all().delete()
+            inside = set()
+            for distance in (9.99, 9.995, 10.01):
+                for bearing in range(0, 360, 5):
+                    latitude, longitude = self.destination(center, distance, bearing)
+                    listing = self.create_listing(title=f'{distance} km at {bearing}', latitude=latitude,
+                                                  longitude=longitude)
+                    if distance < 10:
+                        inside.add(str(listing.pk))
+
+            response = self.client.get(f'/api/api/listing/?near={center[0]},{center[1]}&radius_km=10')
+            self.assertEqual({listing['listing_id'] for listing in response.data}, inside, center)
+
+    def destination(self, center, distance_km, bearing):
+        """The point ``distance_km`` from ``center`` along ``bearing`` on the search sphere."""
+        lat0, lng0, theta = math.radians(center[0]), math.radians(center[1]), math.radians(bearing)
+        angle = distance_km / EARTH_RADIUS_KM
+        lat = math.asin(math.sin(lat0) * math.cos(angle) + math.cos(lat0) * math.sin(angle) * math.cos(theta))
+        lng = lng0 + math.atan2(math.sin(theta) * math.sin(angle) * math.cos(lat0),
+                                math.cos(angle) - math.sin(lat0) * math.sin(lat))
+        return math.degrees(lat), math.degrees(lng)
+
+    def test_near_me_locates_the_caller_with_a_timeout(self):
+        located = mock.Mock(status_code=200, json=lambda: {'geo': {'latitude': self.center[0],
+                                                                   'longitude': self.center[1]}})
+        with mock.patch('requests.get', return_value=located) as get:
+            for _ in range(2):
+                response = self.client.get('/api/api/listing/?near=me&radius_km=2', REMOTE_ADDR='198.51.100.4',
+                                           HTTP_X_FORWARDED_FOR='203.0.113.9')
+                self.assertEqual({self.distances[listing['listing_id']] for listing in response.data}, {1})
+
+        get.assert_called_once_with('https://api.ipgeolocationapi.com/geolocate/198.51.100.4',
+                                    timeout=settings.GEOIP_TIMEOUT)
+
+    def test_near_me_failures_are_400_and_cached(self):
+        import requests
+
+        with mock.patch('requests.get', side_effect=requests.Timeout) as get:
+            statuses = [self.client.get('/api/api/listing/?near=me').status_code for _ in range(2)]
+
+        self.assertEqual(statuses, [400, 400])
+        self.assertEqual(get.call_count, 1)
+
+    def test_invalid_near_parameters_are_400(self):
+        self.assertEqual(self.client.get('/api/api/listing/?near=abc').status_code, 400)
+        self.assertEqual(self.client.get('/api/api/listing/?near=95,0').status_code, 400)
+        self.assertEqual(self.client.get('/api/api/listing/?near=0,0&radius_km=1000').status_code, 400)
+
+
+class AuthenticationTests(ListingsTestCase):
+    """user-032: stateless JWT authentication with revocation."""
+
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        tokens = self.client.post('/api/auth/token/', {'username': 'alice', 'password': 'secret'}, format='json')
+        self.assertEqual(tokens.status_code, 200)
+        self.access, self.refresh = tokens.data['access'], tokens.data['refresh']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.access}')
+
+    def test_authenticating_a_request_needs_no_user_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/api/booking/history/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('auth_user' in query['sql'] or 'django_session' in query['sql']
+                             for query in queries.captured_queries))
+
+    def test_revoked_tokens_are_rejected(self):
+        response = self.client.post('/api/auth/token/revoke/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 205)
+
+        self.assertEqual(self.client.get('/api/api/booking/history/').status_code, 401)
+        refreshed = APIClient().post('/api/auth/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(refreshed.status_code, 401)
+
+    def test_refresh_reloads_the_user(self):
+        self.user.is_staff = True
+        self.user.save()
+        response = APIClient().post('/api/auth/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(AccessToken(response.data['access'])['is_staff'])
+
+        self.user.is_staff = False
+        self.user.save()
+        response = APIClient().post('/api/auth/token/refresh/', {'refresh': response.data['refresh']},
+                                    format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(AccessToken(response.data['access'])['is_staff'])
+
+        self.user.is_active = False
+        self.user.save()
+        response = APIClient().post('/api/auth/token/refresh/', {'refresh': response.data['refresh']},
+                                    format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_for_a_deleted_user_is_refused(self):
+        self.user.delete()
+        response = APIClient().post('/api/auth/token/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_payment_initiation_with_malformed_booking_id_is_404(self):
+        response = self.client.post('/api/payments/initiate/', {'booking_id': 'nope'}, format='json')
+        self.assertEqual(response.status_code, 404)
+
+
+class ApiDocsTests(TestCase):
+    """user-036: a prebuilt OpenAPI document and lazily loaded docs and payment dependencies."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.schema_file = os.path.join(directory.name, 'openapi.json')
+        docs._schema = None
+        self.addCleanup(setattr, docs, '_schema', None)
+
+    def test_build_command_writes_the_schema(self):
+        call_command('build_openapi_schema', output=self.schema_file, stdout=mock.Mock())
+
+        with open(self.schema_file) as artifact:
+            schema = json.load(artifact)
+        self.assertIn('/api/listing/', schema['paths'])
+        self.assertEqual(os.stat(self.schema_file).st_mode & 0o777, 0o644)
+
+    def test_schema_is_served_from_the_artifact_with_caching_headers(self):
+        with open(self.schema_file, 'w') as artifact:
+            artifact.write('{"swagger": "2.0", "paths": {}}')
+
+        with override_settings(OPENAPI_SCHEMA_FILE=self.schema_file), \
+                mock.patch.object(docs, 'generate_schema') as generate:
+            response = self.client.get('/swagger.json')
+            cached = self.client.get('/swagger.json', HTTP_IF_NONE_MATCH=response['ETag'])
+            ui_format = self.client.get('/swagger/?format=openapi')
+
+        generate.assert_not_called()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, b'{"swagger": "2.0", "paths": {}}')
+        self.assertIn('max-age=3600', response['Cache-Control'])
+        self.assertIn('public', response['Cache-Control'])
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(ui_format.content, response.content)
+        self.assertEqual(self.client.post('/swagger.json').status_code, 405)
+
+    def test_schema_is_generated_once_without_an_artifact(self):
+        with override_settings(OPENAPI_SCHEMA_FILE=self.schema_file), \
+                mock.patch.object(docs, 'generate_schema', return_value=b'{}') as generate:
+            for _ in range(3):
+                self.assertEqual(self.client.get('/swagger.json').status_code, 200)
+
+        self.assertEqual(generate.call_count, 1)
+
+    def test_web_startup_does_not_load_the_docs_generator_or_chapa_client(self):
+        script = (
+            "import sys, django; django.setup()\n"
+            "from django.urls import get_resolver; get_resolver().url_patterns\n"
+            "print(sorted(m for m in sys.modules if m.startswith('drf_yasg.')))\n"
+            "import listings.chapa; print(hasattr(listings.chapa, 'requests'))\n"
+        )
+        result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True,
+                                env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)})
+
+        self.assertEqual(result.stdout.split('\n')[:2], ['[]', 'False'])
+
+    @override_settings(CHAPA_SECRET_KEY='')
+    def test_chapa_secret_is_required_on_first_use(self):
+        with mock.patch('requests.post') as post, self.assertRaises(ImproperlyConfigured):
+            chapa.initialize_transaction({'amount': '10'})
+        post.assert_not_called()
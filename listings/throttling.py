@@ -0,0 +1,220 @@
+"""
+Rate limiting and load shedding for the expensive API endpoints.
+
+Token buckets live in the Django cache so limits hold across processes.
+To keep the check off the cache on most requests, each process leases a
+share of a bucket (``RATE_LIMIT_LEASE_FRACTION``) and spends it locally;
+only an empty lease costs a cache round-trip, and a rejection is
+remembered locally until a token is due. A lease stays spendable for as
+long as the bucket takes to earn it back, and whatever is left of it is
+returned when the process next leases. Updates to the shared bucket are
+serialised by a short cache lock, so concurrent processes never spend the
+same tokens. If the lock cannot be had in time (a slow cache, or a lock left
+by a crashed holder) the request is let through rather than rejected.
+
+Load shedding uses process-local measurements recorded by
+``LoadMonitorMiddleware``: too many in-flight requests answer 503, a p95
+latency above the threshold answers 429, both with ``Retry-After``.
+"""
+import math
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.throttling import BaseThrottle
+
+
+class LoadMonitor:
+    """In-flight request count and recent latencies of this process."""
+
+    def __init__(self, window: int, recompute_every: int = 20):
+        self.in_flight = 0
+        self.p95_ms = 0.0
+        self._latencies = deque(maxlen=window)
+        self._recompute_every = recompute_every
+        self._samples = 0
+        self._lock = threading.Lock()
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, elapsed_ms: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._latencies.append(elapsed_ms)
+            self._samples += 1
+            if self._samples % self._recompute_every == 0:
+                ordered = sorted(self._latencies)
+                self.p95_ms = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+
+load_monitor = LoadMonitor(window=settings.LOAD_SHEDDING['WINDOW'])
+
+
+class LoadMonitorMiddleware:
+    """Record in-flight requests and their latency for load shedding."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        load_monitor.started()
+        start = time.perf_counter()
+        try:
+            return self.get_response(request)
+        finally:
+            load_monitor.finished((time.perf_counter() - start) * 1000)
+
+
+class ServiceOverloaded(APIException):
+    """503 response with ``Retry-After``, raised while shedding load."""
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Service temporarily overloaded, try again later.'
+    default_code = 'service_overloaded'
+
+    def __init__(self, wait: int, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = wait
+
+
+class TokenBucket:
+    """Token bucket stored in the Django cache, spent through local leases."""
+    lock_timeout = 1
+    lock_wait = 0.25
+    max_leases = 10000
+
+    def __init__(self, scope: str, capacity: float, refill_rate: float):
+        self.scope = scope
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.lease_size = max(1, math.ceil(capacity * settings.RATE_LIMIT_LEASE_FRACTION))
+        self.lease_seconds = max(settings.RATE_LIMIT_LEASE_SECONDS, self.lease_size / refill_rate)
+        # ident -> (tokens left, lease expiry, no tokens until)
+        self._leases = {}
+        self._lock = threading.Lock()
+
+    def take(self, ident: str) -> float:
+        """Spend one token for ``ident``; return 0 on success or the seconds to wait."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, expires_at, blocked_until = self._leases.get(ident, (0, now, now))
+            if blocked_until > now:
+                return blocked_until - now
+            if tokens >= 1 and expires_at > now:
+                self._leases[ident] = (tokens - 1, expires_at, now)
+                return 0
+
+        leased = self._lease_from_cache(ident, returned=tokens)
+        if leased is None:
+            # Fail open; the unspent tokens stay with the local lease.
+            return 0
+        granted, wait = leased
+        with self._lock:
+            if len(self._leases) >= self.max_leases:
+                self._leases = {key: lease for key, lease in self._leases.items() if max(lease[1:]) > now}
+            if granted:
+                self._leases[ident] = (granted - 1, now + self.lease_seconds, now)
+            else:
+                self._leases[ident] = (0, now, now + wait)
+        return wait
+
+    def _lease_from_cache(self, ident: str, returned: int = 0):
+        """Lease up to ``lease_size`` tokens, handing back ``returned`` unspent ones.
+
+        Returns ``(granted, wait)``, or None when the bucket lock is busy.
+        """
+        key = f"ratelimit:{self.scope}:{ident}"
+        lock_key = f"{key}:lock"
+        deadline = time.monotonic() + self.lock_wait
+        while not cache.add(lock_key, 1, self.lock_timeout):
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.005)
+        try:
+            now = time.time()
+            tokens, updated_at = cache.get(key, (self.capacity, now))
+            tokens = min(self.capacity, tokens + returned + (now - updated_at) * self.refill_rate)
+            granted = min(self.lease_size, int(tokens))
+            timeout = math.ceil(self.capacity / self.refill_rate) + 60
+            cache.set(key, (tokens - granted, now), timeout)
+        finally:
+            cache.delete(lock_key)
+        if granted:
+            return granted, 0
+        return 0, (1 - tokens) / self.refill_rate
+
+
+def shed_load():
+    """Return seconds to back off if this process should shed load, else 0.
+
+    Raises ``ServiceOverloaded`` (503) when too many requests are in flight.
+    """
+    config = settings.LOAD_SHEDDING
+    if load_monitor.in_flight > config['MAX_IN_FLIGHT']:
+        raise ServiceOverloaded(wait=config['RETRY_AFTER'])
+    if load_monitor.p95_ms > config['P95_LATENCY_MS']:
+        return config['RETRY_AFTER']
+    return 0
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Per-user and per-IP token bucket limit for one scope in ``RATE_LIMITS``.
+
+    Requests it applies to are also shed while the process is overloaded.
+    """
+    scope = None
+    _buckets = {}
+
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_bucket(self) -> TokenBucket:
+        bucket = self._buckets.get(self.scope)
+        if bucket is None:
+            config = settings.RATE_LIMITS[self.scope]
+            bucket = TokenBucket(self.scope, config['capacity'], config['refill_rate'])
+            self._buckets[self.scope] = bucket
+        return bucket
+
+    def applies(self, request, view) -> bool:
+        """Whether this request counts against the limit."""
+        return True
+
+    def allow_request(self, request, view):
+        if not self.applies(request, view):
+            return True
+        self.wait_seconds = shed_load()
+        if self.wait_seconds:
+            return False
+        bucket = self.get_bucket()
+        idents = [f"ip:{self.get_ident(request)}"]
+        if request.user and request.user.is_authenticated:
+            idents.append(f"user:{request.user.pk}")
+        self.wait_seconds = max(bucket.take(ident) for ident in idents)
+        return self.wait_seconds == 0
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class SearchThrottle(TokenBucketThrottle):
+    scope = 'search'
+
+    def applies(self, request, view) -> bool:
+        return bool(request.query_params.get('search'))
+
+
+class BookingCreateThrottle(TokenBucketThrottle):
+    scope = 'booking_create'
+
+    def applies(self, request, view) -> bool:
+        return getattr(view, 'action', None) == 'create'
+
+
+class PaymentInitiateThrottle(TokenBucketThrottle):
+    scope = 'payment_initiate'
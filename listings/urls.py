@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ListingViewSet, BookingViewSet, ReviewViewSet, VerifyPaymentView, InitiatePaymentView
+from .views import ListingViewSet, BookingViewSet, ReviewViewSet, VerifyPaymentView, InitiatePaymentView, APIGraphQLView
 
 
 router = DefaultRouter()
@@ -13,4 +13,5 @@ urlpatterns = [
     path('api/', include(router.urls)),
     path('payments/initiate/', InitiatePaymentView.as_view(), name='initiate-payment'),
     path('payments/verify/', VerifyPaymentView.as_view(), name='verify-payment'),
+    path('graphql/', APIGraphQLView.as_view(graphiql=True), name='graphql'),
 ]
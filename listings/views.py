@@ -1,42 +1,92 @@
-from .models import Listing, Booking, Review, Payment
-from .serializers import ListingSerializer, BookingSerializer, ReviewSerializer, PaymentSerializer
+from .models import Listing, Booking, Review, Payment, ArchivedBooking
+from .serializers import (ListingSerializer, BookingSerializer, ReviewSerializer, PaymentSerializer,
+                          ArchivedBookingSerializer)
 from rest_framework import viewsets, permissions, filters
-import requests
+from rest_framework.decorators import action, api_view, authentication_classes, permission_classes
+from rest_framework.settings import api_settings
+from graphene_django.views import GraphQLView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from django.conf import settings
-from .tasks import send_booking_confirmation_email
-
-
-CHAPA_API_URL = "https://api.chapa.co/v1/transaction/initialize"
-CHAPA_VERIFY_URL = "https://api.chapa.co/v1/transaction/verify/"
-CHAPA_SECRET_KEY = settings.CHAPA_SECRET_KEY
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import F
+from django.http import Http404
+from rest_framework.generics import get_object_or_404
+from . import chapa
+from .outbox import enqueue
+from .authentication import revoke_token
+from .autocomplete import autocomplete as listing_autocomplete
+from .filters import NearFilter, PriceRangeFilter
+from .fx import convert
+from .idempotency import ReplayExemptThrottlesMixin, idempotent
+from .schema import validation_rules
+from .throttling import SearchThrottle, BookingCreateThrottle, PaymentInitiateThrottle
+from .tasks import send_booking_confirmation_email, send_payment_confirmation_email
 
 
 class ListingViewSet(viewsets.ModelViewSet):
     """ViewSet for Listing model"""
-    queryset = Listing.objects.all()
+    # ``price`` orders by the base currency price so listings in different currencies compare correctly
+    queryset = Listing.objects.alias(price=F('price_per_night_base'))
     serializer_class = ListingSerializer
     permission_classes = [permissions.IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    throttle_classes = [SearchThrottle]
+    filter_backends = [NearFilter, PriceRangeFilter, filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['title', 'description']
-    ordering_fields = ['title', 'created_at']
+    ordering_fields = ['title', 'created_at', 'price']
 
+    @action(detail=False, methods=['get'])
+    def autocomplete(self, request):
+        """Prefix suggestions over listing titles, towns and counties."""
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 25))
+        except ValueError:
+            return Response({'error': 'limit must be an integer.'}, status=400)
+        return Response(listing_autocomplete.search(request.query_params.get('q', ''), limit))
 
-class BookingViewSet(viewsets.ModelViewSet):
+
+class BookingViewSet(ReplayExemptThrottlesMixin, viewsets.ModelViewSet):
     """ViewSet for Booking model"""
     queryset = Booking.objects.all()
     serializer_class = BookingSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [BookingCreateThrottle]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['user__username', 'listing_title']
     ordering_fields = ['created_at', 'total_price']
 
+    @idempotent('booking-create')
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        booking = serializer.save(user=self.request.user)
-        # Trigger email confirmation task
-        send_booking_confirmation_email.delay(booking.user.email, booking.id)
+        with transaction.atomic():
+            booking = serializer.save(user_id=self.request.user.id)
+            # Queue the confirmation email in the same transaction as the booking
+            enqueue(send_booking_confirmation_email, self.request.user.email, str(booking.booking_id),
+                    dedup_key=f"booking-confirmation:{booking.booking_id}")
+
+    def retrieve(self, request, *args, **kwargs):
+        """Fall through to the archive for bookings no longer in the hot table."""
+        try:
+            return super().retrieve(request, *args, **kwargs)
+        except Http404:
+            archived = get_object_or_404(ArchivedBooking, pk=kwargs[self.lookup_url_kwarg or self.lookup_field])
+            self.check_object_permissions(request, archived)
+            return Response(ArchivedBookingSerializer(archived).data)
+
+    @action(detail=False, methods=['get'])
+    def history(self, request):
+        """All bookings of the current user, current and archived, newest first."""
+        current = BookingSerializer(Booking.objects.filter(user_id=request.user.id), many=True).data
+        archived = ArchivedBookingSerializer(ArchivedBooking.objects.filter(user_id=request.user.id), many=True).data
+        bookings = sorted([*current, *archived], key=lambda booking: booking['start_date'], reverse=True)
+        return Response(bookings)
 
 
 class ReviewViewSet(viewsets.ModelViewSet):
@@ -49,39 +99,55 @@ class ReviewViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'rating']
 
 
-class InitiatePaymentView(APIView):
+class InitiatePaymentView(ReplayExemptThrottlesMixin, APIView):
     permission_classes = [permissions.IsAuthenticated]
+    throttle_classes = [PaymentInitiateThrottle]
 
+    @idempotent('payment-initiate')
     def post(self, request):
         booking_id = request.data.get('booking_id')
         try:
-            booking = Booking.objects.get(id=booking_id, user=request.user)
-        except Booking.DoesNotExist:
+            booking = Booking.objects.select_related('listing_id').get(booking_id=booking_id,
+                                                                      user_id=request.user.id)
+        except (Booking.DoesNotExist, ValidationError):
+            # A malformed booking id cannot match any booking
             return Response({'error': 'Booking not found.'}, status=404)
 
-        tx_ref = f"booking_{booking.id}_{request.user.id}"
+        # Charge in the listing's currency when Chapa accepts it, otherwise convert
+        currency = booking.listing_id.currency.upper()
+        amount = booking.total_price
+        if currency not in settings.CHAPA_CURRENCIES:
+            try:
+                amount = convert(amount, currency, settings.CHAPA_CURRENCIES[0])
+            except ValueError as exc:
+                return Response({'error': str(exc)}, status=400)
+            currency = settings.CHAPA_CURRENCIES[0]
+
+        tx_ref = f"booking_{booking.booking_id}_{request.user.id}"
         data = {
-            "amount": str(booking.total_price),
-            "currency": "ETB",
+            "amount": str(amount),
+            "currency": currency,
             "email": request.user.email,
             "tx_ref": tx_ref,
             "callback_url": "https://yourdomain.com/api/payments/verify/",
         }
-        headers = {"Authorization": f"Bearer {CHAPA_SECRET_KEY}"}
-        chapa_resp = requests.post(CHAPA_API_URL, json=data, headers=headers)
+        chapa_resp = chapa.initialize_transaction(data)
         if chapa_resp.status_code == 200:
             resp_data = chapa_resp.json()
             Payment.objects.create(
-                booking=booking,
-                user=request.user,
+                booking_id=booking,
+                user_id=request.user.id,
                 chapa_tx_ref=tx_ref,
+                amount=amount,
+                currency=currency,
                 status="Pending"
             )
             return Response({
                 "checkout_url": resp_data['data']['checkout_url'],
                 "tx_ref": tx_ref
             })
-        return Response({'error': 'Payment initiation failed.'}, status=400)
+        # A gateway error, reported as 5xx so an Idempotency-Key retry runs again instead of replaying it
+        return Response({'error': 'Payment initiation failed.'}, status=502)
 
 
 class VerifyPaymentView(APIView):
@@ -90,21 +156,53 @@ class VerifyPaymentView(APIView):
     def get(self, request):
         tx_ref = request.query_params.get('tx_ref')
         try:
-            payment = Payment.objects.get(chapa_tx_ref=tx_ref, user=request.user)
+            payment = Payment.objects.get(chapa_tx_ref=tx_ref, user_id=request.user.id)
         except Payment.DoesNotExist:
             return Response({'error': 'Payment not found.'}, status=404)
 
-        headers = {"Authorization": f"Bearer {CHAPA_SECRET_KEY}"}
-        chapa_resp = requests.get(f"{CHAPA_VERIFY_URL}{tx_ref}/", headers=headers)
+        chapa_resp = chapa.verify_transaction(tx_ref)
         if chapa_resp.status_code == 200:
             resp_data = chapa_resp.json()
             status_str = resp_data['data']['status']
-            if status_str == "success":
-                payment.status = "Completed"
-                from .tasks import send_payment_confirmation_email
-                send_payment_confirmation_email.delay(request.user.email, payment.booking.id)
-            else:
-                payment.status = "Failed"
-            payment.save()
+            with transaction.atomic():
+                if status_str == "success":
+                    payment.status = "Completed"
+                    booking_id = payment.booking_id.booking_id
+                    enqueue(send_payment_confirmation_email, request.user.email, str(booking_id),
+                            dedup_key=f"payment-confirmation:{payment.payment_id}")
+                else:
+                    payment.status = "Failed"
+                payment.save()
             return Response({'status': payment.status})
         return Response({'error': 'Verification failed.'}, status=400)
+
+
+class RevokeTokenView(APIView):
+    """Revoke the caller's access token and, if given, their refresh token."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        refresh = request.data.get('refresh')
+        if refresh:
+            try:
+                refresh_token = RefreshToken(refresh)
+            except TokenError:
+                return Response({'error': 'Invalid refresh token.'}, status=400)
+            if str(refresh_token[jwt_settings.USER_ID_CLAIM]) != str(request.user.id):
+                return Response({'error': 'Refresh token belongs to another user.'}, status=403)
+            revoke_token(refresh_token)
+        if request.auth is not None and jwt_settings.JTI_CLAIM in request.auth:
+            revoke_token(request.auth)
+        return Response(status=status.HTTP_205_RESET_CONTENT)
+
+
+class APIGraphQLView(GraphQLView):
+    """GraphQL endpoint authenticated like the rest of the API."""
+
+    @classmethod
+    def as_view(cls, *args, **kwargs):
+        kwargs.setdefault('validation_rules', validation_rules())
+        view = super().as_view(*args, **kwargs)
+        view = permission_classes([permissions.IsAuthenticated])(view)
+        view = authentication_classes(api_settings.DEFAULT_AUTHENTICATION_CLASSES)(view)
+        return api_view(['GET', 'POST'])(view)